@@ -12,8 +12,11 @@ import sys
 import time
 import getpass
 import threading
-from io import BytesIO
+import tempfile
 import logging  # 引入日志模块
+import logging.handlers  # QueueHandler / QueueListener
+import queue
+import atexit
 import traceback  # 引入traceback模块，用于异常信息的详细记录
 import math   #NaN 检测需要
 
@@ -21,24 +24,43 @@ import math   #NaN 检测需要
 # ==============================================
 # 第三方库导入区
 # ==============================================
-import msoffcrypto  # Excel文件解密库
-import pandas as pd  # 数据处理库
-from netmiko import ConnectHandler  # 网络设备连接库
-try:
-    from netmiko import exceptions  # Netmiko 4.x
-except ImportError:
-    import netmiko.ssh_exception as exceptions  # Netmiko 3.x 兼容
+# openpyxl / msoffcrypto / netmiko 导入开销较大，改为在首次使用处延迟导入：
+#   msoffcrypto —— is_encrypted() / read_encrypted_file()
+#   openpyxl    —— _load_info_workbook()（两个info读取函数共用）
+#   netmiko     —— _load_netmiko()（主线程创建巡检线程池之前调用一次）
+
+# netmiko 连接类和异常模块，由 _load_netmiko() 加载后绑定，inspection() 直接使用
+ConnectHandler = None
+netmiko_exceptions = None
+
+
+def _load_netmiko():
+    """
+    延迟导入netmiko，并绑定到模块级 ConnectHandler / netmiko_exceptions
+    必须在主线程中、创建线程池之前调用：多个线程同时首次导入 netmiko/paramiko/cryptography
+    这类含C扩展的大型包可能死锁或拿到未初始化完成的模块（PyInstaller打包环境下尤甚）
+    """
+    global ConnectHandler, netmiko_exceptions
+    from netmiko import ConnectHandler  # 网络设备连接库
+    try:
+        from netmiko import exceptions as netmiko_exceptions  # Netmiko 4.x
+    except ImportError:
+        import netmiko.ssh_exception as netmiko_exceptions  # Netmiko 3.x 兼容
 
 
 # ==============================================
 # 编码修复区（解决特定环境下的idna编码问题）
 # ==============================================
-import idna
 import codecs
-import encodings.idna
-# 注册自定义编码处理器，修复idna编码冲突
-codecs.register(lambda name: encodings.idna.getregentry()
-                if name == 'idna' else None)
+# 仅当标准查找找不到idna编码时（如打包环境缺失）才注册自定义编码处理器，
+# 正常环境下不向全局编码查找链追加额外的查找函数
+try:
+    codecs.lookup('idna')
+except LookupError:
+    import encodings.idna
+    # 注册自定义编码处理器，修复idna编码冲突
+    codecs.register(lambda name: encodings.idna.getregentry()
+                    if name == 'idna' else None)
 
 
 # ==============================================
@@ -69,16 +91,25 @@ DEFAULT_MAX_PAGE = 200          # 默认分页上限
 BIG_OUTPUT_MAX_PAGE = DEFAULT_MAX_PAGE * 3  # 大输出命令分页上限（默认值的3倍）
 # 分页保护机制：重复页最大次数，防止死循环
 MAX_REPEAT_PAGE = 5
+# 分页符只出现在每页回显末尾，只在最新一页的末尾这么多字符内查找
+PAGINATION_TAIL_CHARS = 512
+# 设备连接超时（秒）
+DEVICE_CONN_TIMEOUT = 15
+# 设备信息必填字段
+REQUIRED_DEVICE_FIELDS = ('device_type', 'host', 'ip', 'username', 'port')
+# 解密后info文件的内存缓冲上限（字节），超过后才落盘到临时文件（info文件含设备账号密码，常规大小始终留在内存中）
+DECRYPT_SPOOL_MAX_SIZE = 16 << 20
 
 # 定义无回显命令集合（执行后通常无输出，需特殊处理）
-NO_OUTPUT_CMDS = {
+# 使用 frozenset：导入后不可变，命令清洗后只需一次哈希查找
+NO_OUTPUT_CMDS = frozenset({
     "sys", "enable", "user-inter con 0", "quit",
     "undo screen-length", "screen-length disable",
     "screen-length enable", "screen-length 0",
     "screen-length 0 temporary"
-}
+})
 # 定义输出巨大的命令集合
-BIG_OUTPUT_CMDS = {
+BIG_OUTPUT_CMDS = frozenset({
     "display ospf routing",
     "display ip routing-table statistics",
     "display ip routing-table",
@@ -88,7 +119,7 @@ BIG_OUTPUT_CMDS = {
     "display mac-address",
     "display device manuinfo",
     "display elabel"
-}
+})
 # 定义分页符模式（用于处理输出分页的情况）
 PAGINATION_PATTERNS = [
     "---- More ----",     # H3C、华为常见分页符
@@ -99,6 +130,34 @@ PAGINATION_PATTERNS = [
     "<--- More --->",     # 某些H3C设备
     "<Press ENTER to continue>",  # 华为设备
 ]
+# 分页符对应的翻页按键（按规范分页符查表，导入时确定，分页循环内无需逐个比较）
+PAGE_TURN_KEYS = {
+    "---- More ----": (" ", "空格"),
+    "--More--": (" ", "空格"),
+    "<--- More --->": (" ", "空格"),
+    "<Press ENTER to continue>": ("\n", "回车"),
+}
+# 无回显命令执行失败的回显特征
+CMD_ERROR_PATTERNS = (
+    "Permission denied",
+    "Unrecognized command",
+    "% Unrecognized command",
+    "Error: Unrecognized command",
+    "invalid input",
+    "Invalid command",
+)
+# 不可识别命令的回显特征（"Error: Unrecognized command found at '^' position." 等完整报错均包含此片段，匹配一次即可）
+UNRECOGNIZED_CMD_MARK = "Unrecognized command"
+# 首页需全文检查不可识别命令的报错（报错紧跟在回显的命令之后，位于首页开头）；
+# 后续翻页时报错只会出现在该页末尾，只需检查末尾这么多字符
+UNRECOGNIZED_TAIL_CHARS = 1024
+# screen-length 命令执行失败时依次尝试的替代命令（兼容不同厂商/版本）
+SCREEN_LENGTH_FALLBACK_CMDS = (
+    "screen-length 0",
+    "screen-length 0 temporary",
+    "undo screen-length",
+    "screen-length enable",
+)
 # 定义错误关键词（用于识别异常输出）
 ERROR_KEYWORDS = [
         '连接失败', '超时异常', '无法连接', '连接断开', 'Socket is closed', '不可达',
@@ -108,6 +167,20 @@ ERROR_KEYWORDS = [
         '未进入系统视图'
     ]
 
+# 预编译分页符/错误关键词匹配器（导入时构建一次，每次匹配只需单次扫描）
+# 分页符按清洗后的文本去重，忽略大小写匹配；命中后映射回规范写法
+# 备选项按长度降序排列，避免较短的关键词在同一位置抢先命中、遮蔽较长的变体
+def _build_alternation(words, flags=0):
+    return re.compile('|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)), flags)
+
+_PAGINATION_CANON = {p.strip().lower(): p.strip() for p in PAGINATION_PATTERNS if p.strip()}
+PAGINATION_RE = _build_alternation(_PAGINATION_CANON.values(), re.IGNORECASE)
+ERROR_KEYWORDS_RE = _build_alternation(set(ERROR_KEYWORDS))
+# 错误关键词中的纯ASCII部分（设备侧英文报错，如 'Permission denied'），纯ASCII文本只需匹配这一部分
+ASCII_ERROR_KEYWORDS = frozenset(k for k in ERROR_KEYWORDS if k.isascii())
+ASCII_ERROR_KEYWORDS_RE = _build_alternation(ASCII_ERROR_KEYWORDS)
+CMD_ERROR_RE = _build_alternation(CMD_ERROR_PATTERNS)
+
 # ==============================================
 # 路径配置模块
 # ==============================================
@@ -143,6 +216,8 @@ os.makedirs(LOG_DIR, exist_ok=True)  # 确保日志目录存在，不存在则
 # 3.定义日志路径
 LOG_DATE_DIR = os.path.join(LOG_DIR, LOCAL_TIME)  # logs/2025.06.09/
 os.makedirs(LOG_DATE_DIR, exist_ok=True)    # 确保日志目录存在
+# 设备交互日志路径模板（目录和日期只拼接一次，每台设备只需填入host）
+SESSION_LOG_TEMPLATE = os.path.join(LOG_DATE_DIR, '[{host}]_[' + FILE_DATE + '].log')
 
 # 4.获取用户输入的info文件名（默认为info_port.xlsx）
 FILENAME = input(f"\n请输入info文件名（默认为 info_port.xlsx）：") or "info_port.xlsx"
@@ -161,7 +236,7 @@ for name in ("netmiko", "paramiko", "paramiko.transport", "paramiko.channel"):
     lg.propagate = False           # 防止冒泡到根 logger 再打印
 
 # 线程安全配置
-LOCK = threading.RLock()  # 全局线程锁，防止多线程输出混乱,使用递归锁以避免死锁
+LOCK = threading.RLock()  # 全局线程锁，防止多线程print输出混乱（日志走队列，无需加锁）,使用递归锁以避免死锁
 # 统一日志记录函数（同时输出到控制台和01log.log）
 ERROR_LOG_FILE = os.path.join(LOG_DIR, '01log.log') #输出到logs下和LOG_DATE_DIR同一层
 # 启动时清空01log（在 logging.basicConfig 前执行）
@@ -181,31 +256,68 @@ with LOCK:
         except Exception as inner_e:
             print(f"[日志初始化] 无法清空异常日志文件: {inner_e}")
 # 日志系统配置（必须只调用一次）
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(ERROR_LOG_FILE, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 工作线程只把日志记录放入无锁队列（QueueHandler），由后台 QueueListener 单线程写文件和控制台，
+# 避免数百个巡检线程在文件/控制台 Handler 的锁上排队
+# 命令回显（带 echo 标记的记录）也走同一队列，由监听线程原样输出到标准输出，不与其他设备的日志行交错，也不写入01log.log
+def _is_echo(record):
+    return getattr(record, 'echo', False)
+
+def _is_not_echo(record):
+    return not getattr(record, 'echo', False)
+
+_log_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+_log_file_handler = logging.FileHandler(ERROR_LOG_FILE, encoding='utf-8')
+_log_file_handler.setFormatter(_log_formatter)
+_log_file_handler.addFilter(_is_not_echo)
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(_log_formatter)
+_log_stream_handler.addFilter(_is_not_echo)
+_echo_stream_handler = logging.StreamHandler(sys.stdout)
+_echo_stream_handler.setFormatter(logging.Formatter('%(message)s'))
+_echo_stream_handler.addFilter(_is_echo)
+
+LOG_QUEUE = queue.SimpleQueue()
+LOG_LISTENER = logging.handlers.QueueListener(LOG_QUEUE, _log_file_handler, _log_stream_handler, _echo_stream_handler)
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.handlers = [logging.handlers.QueueHandler(LOG_QUEUE)]
+LOG_LISTENER.start()
+atexit.register(LOG_LISTENER.stop)  # 程序退出时写完队列中剩余的日志
+
+
+def flush_log_queue():
+    """
+    等待队列中的日志全部写入01log.log（停止后台监听线程再重新启动）
+    读取01log.log统计异常设备前必须调用，否则可能漏掉尚未落盘的日志
+    """
+    LOG_LISTENER.stop()
+    LOG_LISTENER.start()
+
+
+# log_message 级别名称到日志级别的映射（未知级别按 debug 处理）
+_LOG_LEVELS = {
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL,
+}
+
 
 # 日志统一封装函数，兼容原有 log_message 调用方式
+# 日志队列本身线程安全，无需再加全局锁
 def log_message(msg: str, level='info'):
-    with LOCK:
-        try:
-            if level == 'info':
-                logging.info(msg)
-            elif level == 'warning':
-                logging.warning(msg)
-            elif level == 'error':
-                logging.error(msg)
-            elif level == 'critical':
-                logging.critical(msg)
-            else:
-                logging.debug(msg)
-        except Exception as e:
-            print(f"[日志记录异常] 记录日志失败: {e}")
+    try:
+        _root_logger.log(_LOG_LEVELS.get(level, logging.DEBUG), msg)
+    except Exception as e:
+        print(f"[日志记录异常] 记录日志失败: {e}")
+
+
+# 命令回显输出到控制台：与日志共用队列，整块回显由监听线程一次写出
+def echo_message(msg: str):
+    try:
+        _root_logger.info(msg, extra={'echo': True})
+    except Exception as e:
+        print(f"[日志记录异常] 输出回显失败: {e}")
 
 
 # ==============================================
@@ -215,6 +327,8 @@ def log_message(msg: str, level='info'):
 # 数据清理函数
 def _safe_str(x) -> str:
     """把 None/NaN/非字符串安全转换为字符串；NaN 返回空串。"""
+    if type(x) is str:  # 绝大多数调用传入的就是字符串，直接返回
+        return x
     if x is None:
         return ""
     if isinstance(x, float):
@@ -226,6 +340,9 @@ def _safe_str(x) -> str:
         return str(x) #普通 float 显式转字符串，避免 .strip 报错
     return x if isinstance(x, str) else str(x)
 
+# 控制符（\r \n \t）删除表，str.translate 单次遍历即可移除全部控制符
+_CTRL_TRANS = str.maketrans("", "", "\r\n\t")
+
 # ✅ 修改后的强力字符串清理函数
 def _strip_or_empty(x) -> str:
     """
@@ -236,9 +353,9 @@ def _strip_or_empty(x) -> str:
     """
     if not isinstance(x, str):
         return ""
-    cleaned = x.replace("_x000d_", "")   # 移除 Excel 隐藏回车
-    cleaned = re.sub(r"[\r\n\t]", "", cleaned)  # 移除控制符
-    return cleaned.strip()
+    if "_x000d_" in x:  # 多数单元格不含该标记，先判断可省去一次字符串复制
+        x = x.replace("_x000d_", "")   # 移除 Excel 隐藏回车
+    return x.translate(_CTRL_TRANS).strip()  # 移除控制符并去掉首尾空格
 
 # 列表/元组清理函数
 def _clean_list_to_str(seq):
@@ -252,6 +369,83 @@ def _clean_list_to_str(seq):
             out.append(sv)
     return out
 
+# 工作表读取函数
+def _read_sheet_table(worksheet) -> Tuple[List, List[List[str]]]:
+    """
+    逐行流式读取 openpyxl 工作表，返回 (列标题列表, 数据行列表)
+    规则与原 pd.read_excel(dtype=str, keep_default_na=False) 保持一致：
+    - 首行为列标题；空标题记为 'Unnamed: 列号'，重名标题依次追加 '.1'、'.2'
+    - 空单元格为空串，整数值的数字不带小数点，公式错误值（#N/A 等）置空串
+    - 去掉每行末尾的空单元格和表尾空行，再按最宽的行补齐空串
+    - 数据单元格按 _strip_or_empty 规则清洗
+    """
+    rows = []
+    last_row_with_data = -1
+    for row in worksheet.iter_rows():
+        values = []
+        for cell in row:
+            value = cell.value
+            if value is None:
+                value = ""
+            elif cell.data_type == 'e':  # 公式错误值，按空值处理
+                value = None
+            elif isinstance(value, float) and value.is_integer():
+                value = int(value)
+            values.append(value)
+        while values and values[-1] == "":  # 去掉行尾空单元格
+            values.pop()
+        if values:
+            last_row_with_data = len(rows)
+        rows.append(values)
+    rows = rows[:last_row_with_data + 1]  # 去掉表尾空行
+    if not rows:
+        return [], []
+
+    width = max(len(r) for r in rows)
+    rows = [r + [""] * (width - len(r)) for r in rows]
+    # 只有一列时，空白行视为空行跳过（多列时空白行保留为空记录）
+    rows = [r for r in rows
+            if len(r) > 1 or not isinstance(r[0], str) or r[0].strip()]
+
+    columns = []
+    counts = {}
+    for i, name in enumerate(rows[0]):
+        if name == "" or name is None:
+            name = f"Unnamed: {i}"
+        cur = counts.get(name, 0)
+        while cur > 0:  # 重名标题追加序号
+            counts[name] = cur + 1
+            name = f"{name}.{cur}"
+            cur = counts.get(name, 0)
+        columns.append(name)
+        counts[name] = cur + 1
+
+    data = [[_strip_or_empty(_safe_str(v)) for v in r] for r in rows[1:]]
+    return columns, data
+
+
+# info工作簿读取函数
+def _load_info_workbook(source) -> Tuple[List[Dict], Dict[str, List]]:
+    """
+    以只读模式打开info工作簿一次，流式读取两张子表：
+    - 子表1：设备信息 -> 以列标题为key的字典列表（每行一个字典）
+    - 子表2：巡检命令 -> 以列标题为key、整列内容为list的字典
+    缺少子表时抛出 ValueError
+    """
+    import openpyxl  # Excel读取库（延迟导入）
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        if len(workbook.worksheets) < 2:
+            raise ValueError(f"info文件只有 {len(workbook.worksheets)} 张子表")
+        device_columns, device_rows = _read_sheet_table(workbook.worksheets[0])
+        cmd_columns, cmd_rows = _read_sheet_table(workbook.worksheets[1])
+    finally:
+        workbook.close()  # 只读模式需显式关闭，释放文件句柄
+
+    devices_dict = [dict(zip(device_columns, row)) for row in device_rows]
+    cmds_dict = {col: [row[i] for row in cmd_rows] for i, col in enumerate(cmd_columns)}
+    return devices_dict, cmds_dict
+
 
 # 判断info文件是否被加密，使用不同的读取方式
 def read_info() -> Tuple[List[Dict], Dict[str, List]]:
@@ -262,6 +456,7 @@ def read_info() -> Tuple[List[Dict], Dict[str, List]]:
 
 # 检测info文件是否被加密
 def is_encrypted(info_file: str) -> bool:
+    import msoffcrypto  # Excel文件解密库（延迟导入）
     try:
         with open(info_file, "rb") as f:
             return msoffcrypto.OfficeFile(f).is_encrypted()  # 检测info文件是否被加密
@@ -269,8 +464,21 @@ def is_encrypted(info_file: str) -> bool:
         return False
 
 
+class _SeekableSpooledFile(tempfile.SpooledTemporaryFile):
+    """
+    补充 seekable()/readable() 的 SpooledTemporaryFile
+    Python 3.11 之前 SpooledTemporaryFile 没有这两个方法，openpyxl(zipfile) 读取子表时会报 AttributeError
+    """
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+
 # 读取被加密info文件
-def read_encrypted_file(info_file: str, max_retry: int = 3) -> pd.DataFrame:
+def read_encrypted_file(info_file: str, max_retry: int = 3) -> Tuple[List[Dict], Dict[str, List]]:
+    import msoffcrypto  # Excel文件解密库（延迟导入）
     retry_count = 0  # 初始化重试计数器，用于记录用户尝试输入密码的次数
     while retry_count < max_retry:  # 当重试次数小于最大允许重试次数时，继续循环
         try:
@@ -281,25 +489,19 @@ def read_encrypted_file(info_file: str, max_retry: int = 3) -> pd.DataFrame:
                     "文件受密码保护，必须提供密码！")  # 抛出自定义异常，提示用户必须提供密码
 
             # 解密文件
-            decrypted_data = BytesIO()  # 创建一个BytesIO对象，用于在内存中存储解密后的文件内容
-            # BytesIO是一个内存中的二进制流，可以像文件一样进行读写操作
-            with open(info_file, "rb") as f:  # 以二进制只读模式打开加密的info文件
-                # 使用msoffcrypto库创建一个OfficeFile对象，表示加密的Office文件
-                office_file = msoffcrypto.OfficeFile(f)
-                office_file.load_key(password=password)  # 使用用户提供的密码加载解密密钥
-                # 解密文件内容，并将解密后的数据写入decrypted_data对象中
-                office_file.decrypt(decrypted_data)
-            decrypted_data.seek(0)  # 将decrypted_data的指针重置到起始位置，以便后续读取操作
-            # 由于解密后的数据已经写入decrypted_data，需要将指针重置到开头，以便后续读取
-
-            # 读取解密后的文件
-            devices_dataframe = pd.read_excel(
-                decrypted_data, sheet_name=0, dtype=str, keep_default_na=False)
-            cmds_dataframe = pd.read_excel(
-                decrypted_data, sheet_name=1, dtype=str,keep_default_na=False)
-                # === 新增：对两张表做“去空白 + 非字符串置空串”的清洗 ===
-            devices_dataframe = devices_dataframe.applymap(_strip_or_empty)
-            cmds_dataframe    = cmds_dataframe.applymap(_strip_or_empty)
+            # 解密结果先放在内存中（含明文账号密码，常规大小的info文件不落盘），超过DECRYPT_SPOOL_MAX_SIZE后才转存临时文件
+            with _SeekableSpooledFile(max_size=DECRYPT_SPOOL_MAX_SIZE) as decrypted_data:
+                with open(info_file, "rb") as f:  # 以二进制只读模式打开加密的info文件
+                    # 使用msoffcrypto库创建一个OfficeFile对象，表示加密的Office文件
+                    office_file = msoffcrypto.OfficeFile(f)
+                    office_file.load_key(password=password)  # 使用用户提供的密码加载解密密钥
+                    # 解密文件内容，并将解密后的数据写入decrypted_data对象中
+                    office_file.decrypt(decrypted_data)
+                decrypted_data.seek(0)  # 将decrypted_data的指针重置到起始位置，以便后续读取操作
+                # 由于解密后的数据已经写入decrypted_data，需要将指针重置到开头，以便后续读取
+
+                # 读取解密后的文件（只打开并解析一次工作簿，再分别读取两张子表）
+                devices_dict, cmds_dict = _load_info_workbook(decrypted_data)
 
         except FileNotFoundError:  # 如果没有配置info文件或info文件名错误
             print(f'\n没有找到info文件！\n')  # 提示用户没有找到info文件或info文件名错误
@@ -320,33 +522,17 @@ def read_encrypted_file(info_file: str, max_retry: int = 3) -> pd.DataFrame:
             print(f"\n解密失败：{str(e)}")
             sys.exit(1)
         else:
-            devices_dict = devices_dataframe.to_dict('records')  # 将DataFrame转换成字典
-            # "records"参数规定外层为列表，内层以列标题为key，以此列的行内容为value的字典
-            # 若有多列，代表字典内有多个key:value对；若有多行，每行为一个字典
-
-            cmds_dict = cmds_dataframe.to_dict('list')  # 将DataFrame转换成字典
-            # "list"参数规定外层为字典，列标题为key，列下所有行内容以list形式为value的字典
-            # 若有多列，代表字典内有多个key:value对
-
-            # === 对 cmds_dict 的每一列进行二次清洗（把 None/NaN 变成 ""，strip）===
-            for k, lst in list(cmds_dict.items()):
-                if not isinstance(lst, list):
-                    lst = [lst]
-                lst = [_strip_or_empty(_safe_str(x)) for x in lst]
-                cmds_dict[k] = lst
-
+            # devices_dict：外层为列表，内层以列标题为key，以此列的行内容为value的字典（每行一个字典）
+            # cmds_dict：外层为字典，列标题为key，列下所有行内容以list形式为value
+            # 两张表的单元格在读取时已清洗为去空白的字符串，无需二次清洗
             return devices_dict, cmds_dict
 
 
 # 读取未加密info文件
-def read_unencrypted_file(info_file: str) -> pd.DataFrame:
+def read_unencrypted_file(info_file: str) -> Tuple[List[Dict], Dict[str, List]]:
     try:
-        devices_dataframe = pd.read_excel(info_file, sheet_name=0, dtype=str, keep_default_na=False)
-        cmds_dataframe = pd.read_excel(info_file, sheet_name=1, dtype=str, keep_default_na=False)
-        # === info表统一清洗 ===
-        # 替换applymap为apply + lambda + map
-        devices_dataframe = devices_dataframe.apply(lambda col: col.map(_strip_or_empty))
-        cmds_dataframe    = cmds_dataframe.apply(lambda col: col.map(_strip_or_empty))
+        # 只读模式打开并解析一次工作簿（zip容器、共享字符串），再流式读取两张子表
+        devices_dict, cmds_dict = _load_info_workbook(info_file)
 
     except FileNotFoundError:  # 如果没有配置info文件或info文件名错误
         print(f'\n没有找到info文件！\n')  # 代表没有找到info文件或info文件名错误
@@ -357,22 +543,50 @@ def read_unencrypted_file(info_file: str) -> pd.DataFrame:
         input('输入Enter退出！')  # 提示用户按Enter键退出
         sys.exit(1)  # 异常退出
     else:
-        devices_dict = devices_dataframe.to_dict('records')  # 将DataFrame转换成字典
-        # "records"参数规定外层为列表，内层以列标题为key，以此列的行内容为value的字典
-        # 若有多列，代表字典内有多个key:value对；若有多行，每行为一个字典
+        # devices_dict：外层为列表，内层以列标题为key，以此列的行内容为value的字典（每行一个字典）
+        # cmds_dict：外层为字典，列标题为key，列下所有行内容以list形式为value
+        # 两张表的单元格在读取时已清洗为去空白的字符串，无需二次清洗
+        return devices_dict, cmds_dict
 
-        cmds_dict = cmds_dataframe.to_dict('list')  # 将DataFrame转换成字典
-        # "list"参数规定外层为字典，列标题为key，列下所有行内容以list形式为value的字典
-        # 若有多列，代表字典内有多个key:value对
 
-        # === 对 cmds_dict 的每一列进行二次清洗（把 None/NaN 变成 ""，strip）===
-        for k, lst in list(cmds_dict.items()):
-            if not isinstance(lst, list):
-                lst = [lst]
-            lst = [_strip_or_empty(_safe_str(x)) for x in lst]
-            cmds_dict[k] = lst
+# 巡检命令预清洗（主线程执行一次，各巡检线程直接复用）
+def prepare_cmds(cmds_dict: Dict[str, List]) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    按设备类型把命令列表预清洗为 (原命令, 清洗后命令) 二元组列表，空命令提前过滤
+    避免每台设备、每条命令在线程内重复执行 _safe_str/_strip_or_empty
+    """
+    prepared = {}
+    for device_type, cmds in cmds_dict.items():
+        pairs = []
+        for cmd in cmds:
+            cmd = _safe_str(cmd)
+            cmd_clean = _strip_or_empty(cmd)
+            if cmd_clean:
+                pairs.append((cmd, cmd_clean))
+        prepared[device_type] = pairs
+    return prepared
 
-        return devices_dict, cmds_dict
+
+# ==============================================
+# 输出匹配模块
+# ==============================================
+
+def find_pagination(buf: str):
+    """在回显中查找分页符，返回命中的规范分页符（如 '---- More ----'），未命中返回 None。"""
+    m = PAGINATION_RE.search(buf)
+    return _PAGINATION_CANON[m.group(0).lower()] if m else None
+
+def is_unrecognized(buf: str, tail_only: bool = False) -> bool:
+    """判断回显是否为不可识别命令的报错；tail_only=True 时（翻页后的新页）只检查末尾 UNRECOGNIZED_TAIL_CHARS 个字符。"""
+    if tail_only:
+        buf = buf[-UNRECOGNIZED_TAIL_CHARS:]
+    return UNRECOGNIZED_CMD_MARK in buf
+
+def find_error(buf: str):
+    """在文本中查找错误关键词，返回首个命中的关键词，未命中返回 None。"""
+    # 纯ASCII文本不可能包含中文关键词，只用较小的ASCII关键词匹配器扫描
+    m = (ASCII_ERROR_KEYWORDS_RE if buf.isascii() else ERROR_KEYWORDS_RE).search(buf)
+    return m.group(0) if m else None
 
 
 # 自动分页处理函数
@@ -389,6 +603,7 @@ def handle_pagination(
     BIG_OUTPUT_CMDS 大输出命令列表
     PAGINATION_PATTERNS 分页符列表
     LONG_TIMEOUT 长超时时间
+    - 返回值统一为字符串（设备回显已在入口处规整一次），调用方无需再做 _safe_str
     """
     # 增强命令清洗
     cmd = _safe_str(cmd)
@@ -399,115 +614,92 @@ def handle_pagination(
     if cmd_clean in NO_OUTPUT_CMDS:
         # 增强日志记录
         if enable_show_output == 'y':
-            with LOCK:
-                log_message(f"[DEBUG] 设备 {ssh.host} 执行无输出命令：{cmd_clean}")
+            log_message(f"[DEBUG] 设备 {ssh.host} 执行无输出命令：{cmd_clean}")
         show = ssh.send_command_timing(cmd, read_timeout=timeout_per_cmd)
         # === 修改：对 show 做一次安全规整再判断 ===
         s_show = _safe_str(show)
         
         # 新增：错误信息检测
-        error_patterns = [
-            "Permission denied",
-            "Unrecognized command",
-            "% Unrecognized command",
-            "Error: Unrecognized command",
-            "invalid input",
-            "Invalid command"
-        ]
-        
-        has_error = any(pattern in s_show for pattern in error_patterns)
+        has_error = CMD_ERROR_RE.search(s_show) is not None
         
         # 新增：screen-length命令特殊处理
         if "screen-length" in cmd_clean and has_error:
             # 尝试其他screen-length相关命令
-            alternative_cmds = [
-                "screen-length 0",
-                "screen-length 0 temporary",
-                "undo screen-length",
-                "screen-length enable"
-            ]
-            
-            for alt_cmd in alternative_cmds:
+            for alt_cmd in SCREEN_LENGTH_FALLBACK_CMDS:
                 if alt_cmd != cmd_clean:  # 避免重复尝试相同命令
                     if enable_show_output == 'y':
-                        with LOCK:
-                            log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 执行失败，尝试替代命令：{alt_cmd}")
+                        log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 执行失败，尝试替代命令：{alt_cmd}")
                     alt_show = ssh.send_command_timing(alt_cmd, read_timeout=timeout_per_cmd)
                     alt_s_show = _safe_str(alt_show)
                     # 检查替代命令是否执行成功
-                    if not any(pattern in alt_s_show for pattern in error_patterns):
+                    if CMD_ERROR_RE.search(alt_s_show) is None:
                         if enable_show_output == 'y':
-                            with LOCK:
-                                log_message(f"[DEBUG] 设备 {ssh.host} 替代命令 {alt_cmd} 执行成功")
-                        return f"命令 {_safe_str(cmd)} 执行失败，已尝试替代命令 {alt_cmd}：{alt_s_show.strip()}"
+                            log_message(f"[DEBUG] 设备 {ssh.host} 替代命令 {alt_cmd} 执行成功")
+                        return f"命令 {cmd} 执行失败，已尝试替代命令 {alt_cmd}：{alt_s_show.strip()}"
         
         # 原有错误处理
         if has_error:
             if enable_show_output == 'y':
-                with LOCK:
-                    log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 执行失败：{s_show.strip()}")
-            return f"命令 {_safe_str(cmd)} 执行失败：{s_show.strip()}"
+                log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 执行失败：{s_show.strip()}")
+            return f"命令 {cmd} 执行失败：{s_show.strip()}"
         
         if s_show.strip() == "":
             if enable_show_output == 'y':
-                with LOCK:
-                    log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 执行成功，无输出")
-            return f"命令 {_safe_str(cmd)} 执行完毕，无输出。"
+                log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 执行成功，无输出")
+            return f"命令 {cmd} 执行完毕，无输出。"
         elif s_show.strip() == cmd:
             if enable_show_output == 'y':
-                with LOCK:
-                    log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 已发送，可能无回显")
-            return f"命令 {_safe_str(cmd)} 已发送，但可能无回显或未生效。"
+                log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 已发送，可能无回显")
+            return f"命令 {cmd} 已发送，但可能无回显或未生效。"
         else:
             if enable_show_output == 'y':
-                with LOCK:
-                    log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 返回结果：{s_show.strip()}")
-            return show
+                log_message(f"[DEBUG] 设备 {ssh.host} 命令 {cmd_clean} 返回结果：{s_show.strip()}")
+            return s_show
 
     # 2. 输出巨大的命令，自动放大max_page和超时
-    if cmd_clean in BIG_OUTPUT_CMDS:
+    is_big_output = cmd_clean in BIG_OUTPUT_CMDS  # 只判定一次，分页循环内复用
+    if is_big_output:
         # 增强日志记录
         if enable_show_output == 'y':
-            with LOCK:
-                log_message(f"[DEBUG] 设备 {ssh.host} 执行大输出命令：{cmd_clean}")
+            log_message(f"[DEBUG] 设备 {ssh.host} 执行大输出命令：{cmd_clean}")
         max_page = max(max_page, BIG_OUTPUT_MAX_PAGE)   # 大输出命令最大页数设为3倍，最大不超过LONG_TIMEOUT
         # 大输出命令超时时间设为3倍，最大不超过LONG_TIMEOUT
         timeout_per_cmd = min(timeout_per_cmd * 3, LONG_TIMEOUT)
         if enable_show_output == 'y':
-            with LOCK:
-                log_message(f"[DEBUG] 大输出命令调整：max_page={max_page}, timeout={timeout_per_cmd}")
+            log_message(f"[DEBUG] 大输出命令调整：max_page={max_page}, timeout={timeout_per_cmd}")
 
     # 3. 标准分页处理
     show = ssh.send_command_timing(cmd, read_timeout=timeout_per_cmd)
     # 快速判定不可识别命令
     # === 修改：用 _safe_str 包一层，避免后续 in 判断打到 float ===
     s_show = _safe_str(show)
-    if ("Unrecognized command" in s_show or
-            "Error: Unrecognized command found at '^' position." in s_show):
-        return show
+    if is_unrecognized(s_show):
+        return s_show
 
     page_count = 0  # 分页计数器
     prev_output = ""    # 上一页输出内容
     repeat_count = 0    # 重复页计数器
+    # 各页回显先放入列表，结束时一次性拼接，避免每翻一页都复制整段累计输出
+    # 每轮只检查最新一页（s_show），不再反复扫描全部累计内容
+    pages = [s_show]
 
     pagination_start_time = time.time() # 分页开始时间
+    # 为大输出命令调整重复页阈值，允许更多重复页
+    current_max_repeat = MAX_REPEAT_PAGE * 2 if is_big_output else MAX_REPEAT_PAGE
 
     while True:
         # 分页过程中如遇到错误命令立即break
-        # === 修改：循环内也使用 s_show 做判断 ===
-        s_show = _safe_str(show)
+        # === 修改：循环内也使用 s_show（最新一页）做判断 ===
 
-        # 1.检测不可识别的命令
-        if ("Unrecognized command" in s_show or
-                "Error: Unrecognized command found at '^' position." in s_show):
+        # 1.检测不可识别的命令（首页进入循环前已全文检查，这里只需检查翻页后新页的末尾）
+        if is_unrecognized(s_show, tail_only=True):
             # 分页调试日志
             if enable_show_output == 'y':
-                with LOCK:
-                    log_message(f"[DEBUG][分页调试] 不可识别的命令‘{s_show}’，已强制中止。")
+                log_message(f"[DEBUG][分页调试] 不可识别的命令‘{s_show}’，已强制中止。")
             break
 
         # 2.死循环保护：回显未变化时计数
-        # 如果连续翻页内容无变化，则判定死循环
+        # 如果连续翻页返回的页面内容无变化，则判定死循环
         if s_show.strip() == prev_output.strip():
             repeat_count += 1
         else:
@@ -515,46 +707,41 @@ def handle_pagination(
             prev_output = s_show
         # 分页调试日志
         if enable_show_output == 'y':
-            with LOCK:
-                log_message(f"[DEBUG][分页调试] 当前页内容长度：{len(s_show.strip())}，重复计数：{repeat_count}")
+            log_message(f"[DEBUG][分页调试] 当前页内容长度：{len(s_show.strip())}，重复计数：{repeat_count}")
 
         # 判定重复页次数，超过最大次数则强制中止
-        # 为大输出命令调整重复页阈值，允许更多重复页
-        current_max_repeat = MAX_REPEAT_PAGE * 2 if cmd_clean in BIG_OUTPUT_CMDS else MAX_REPEAT_PAGE
         if repeat_count >= current_max_repeat:
-            show += "\n[警告] 多次翻页后内容无变化，可能陷入分页死循环，已强制中止。\n"
+            pages.append("\n[警告] 多次翻页后内容无变化，可能陷入分页死循环，已强制中止。\n")
             break
 
         # 3.超时保护
         if time.time() -  pagination_start_time > timeout_per_cmd:
-            show += "\n[警告] 分页命令执行超时，已强制中止。\n"
+            pages.append("\n[警告] 分页命令执行超时，已强制中止。\n")
             break
 
-        # 4.正常分页符检测
-        found = False
-        for pattern in PAGINATION_PATTERNS:
-            p = _strip_or_empty(_safe_str(pattern))
-            if not p:
-                continue
-            # 宽松匹配，允许分页符前后有其他字符
-            if p in s_show or p.lower() in s_show.lower():
-                # 分页调试日志
-                if enable_show_output == 'y':
-                    with LOCK:  # 加锁同步控制台输出
-                        log_message(f"[分页调试] 第{page_count}页，识别到分页符：{p}")
-                found = True
-                # 根据分页符自动翻页
-                if p in ["---- More ----", "--More--", "<--- More --->", "  ---- More ----  ", "---- More ----  ", "  ---- More ----"]:
-                    log_message(f"[分页] 设备 {_safe_str(ssh.host)} 命令 {_safe_str(cmd)} 遇到分页符 {repr(p)}，已发送空格翻页。")
-                    show += ssh.send_command_timing(" ", read_timeout=timeout_per_cmd)
-                elif p == "<Press ENTER to continue>":
-                    log_message(f"[分页] 设备 {_safe_str(ssh.host)} 命令 {_safe_str(cmd)} 遇到分页符 {repr(p)}，已发送回车翻页。")
-                    show += ssh.send_command_timing("\n", read_timeout=timeout_per_cmd)
-                break
+        # 4.正常分页符检测（宽松匹配，允许分页符前后有其他字符，忽略大小写）
+        # 分页符总在最新一页的末尾，只扫描页尾，大页回显无需从头扫描
+        p = find_pagination(s_show[-PAGINATION_TAIL_CHARS:])
+        found = p is not None
+        if found:
+            # 分页调试日志
+            if enable_show_output == 'y':
+                log_message(f"[分页调试] 第{page_count}页，识别到分页符：{p}")
+            # 根据分页符查表自动翻页
+            page_key = PAGE_TURN_KEYS.get(p)
+            if page_key is not None:
+                key, key_name = page_key
+                log_message(f"[分页] 设备 {ssh.host} 命令 {cmd} 遇到分页符 {repr(p)}，已发送{key_name}翻页。")
+                # 翻页按键原样发送：normalize=False 避免空格被规整成回车（只翻一行），
+                # strip_command=False 避免把新页的首行当作命令回显剥掉
+                page = ssh.send_command_timing(
+                    key, read_timeout=timeout_per_cmd, normalize=False, strip_command=False)
+                s_show = _safe_str(page)
+                pages.append(s_show)
         page_count += 1
         if not found or page_count > max_page:
             break
-    return show
+    return "".join(pages)
 
 # 检测Paramiko通道是否关闭，会影响ssh连接
 def channel_closed(ssh) -> bool:
@@ -572,7 +759,8 @@ def inspection(login_info, cmds_dict, enable_show_output):
     # 使用传入的设备登录信息和巡检命令登录设备并执行巡检
     # 若登录异常，生成01log文件记录错误信息
     inspection_start_time = time.time()  # 子线程执行计时起始点，用于计算执行耗时
-    ssh = None         # 初始化SSH连接对象
+    inspection_deadline = inspection_start_time + INSPECTION_TASK_TIMEOUT  # 本设备巡检截止时间，只计算一次
+    ssh = None         # 初始化SSH连接对象（netmiko 已由主线程通过 _load_netmiko() 预先加载）
 
     # 输出调试信息：idna模块路径和sys.path（当前已注释）
     # print(f"idna路径: {idna.__file__}")
@@ -585,11 +773,9 @@ def inspection(login_info, cmds_dict, enable_show_output):
             f'设备 {login_info["host"]} 开始连接（超时时间 {login_info["conn_timeout"]} 秒）')
         # 连接调试日志
         if enable_show_output == 'y':
-            with LOCK:  # 加锁同步控制台输出
-                log_message(f"[DEBUG] 正在连接设备：{login_info['host']} ...")
+            log_message(f"[DEBUG] 正在连接设备：{login_info['host']} ...")
         ssh = ConnectHandler(
-            session_log=os.path.join(
-                LOG_DATE_DIR, f"[{login_info['host']}]_[{FILE_DATE}].log"),  # 自动记录完整交互日志
+            session_log=SESSION_LOG_TEMPLATE.format(host=login_info['host']),  # 自动记录完整交互日志
             **login_info
         )
 
@@ -644,30 +830,20 @@ def inspection(login_info, cmds_dict, enable_show_output):
         # 获取设备真实主机名（通过SSH会话提示符解析）
         real_hostname = ssh.find_prompt().strip()
 
-        # 加锁同步控制台输出，避免多线程打印混乱
-        with LOCK:
-            log_message(f'设备 {login_info["host"]} 正在巡检...')
+        log_message(f'设备 {login_info["host"]} 正在巡检...')
 
         # 遍历当前设备类型对应的所有巡检命令
-        # 获取命令列表，防止KeyError
+        # 获取命令列表，防止KeyError（命令已由 prepare_cmds 预清洗并过滤空命令）
         cmds = cmds_dict.get(login_info['device_type'])
         if not cmds:
             log_message(f"设备类型 {login_info['device_type']} 未配置命令，跳过设备 {login_info['host']}", level='error')
             return
-        for cmd in cmds:
-            # 增强命令验证
-            cmd = _safe_str(cmd)
-            cmd_clean = _strip_or_empty(cmd)
-            if not cmd_clean:
-                log_message(f"设备 {login_info['host']} 跳过空命令", level='debug')
-                continue
+        for cmd, cmd_clean in cmds:
             # 命令调试日志
             if enable_show_output == 'y':
-                with LOCK:  # 加锁同步控制台输出
-                    log_message(f"[DEBUG] 设备 {login_info['host']} 执行命令: {cmd_clean}")
+                log_message(f"[DEBUG] 设备 {login_info['host']} 执行命令: {cmd_clean}")
             # 1. 每条命令前第一步，检查任务是否超时，超时立即终止并断开SSH
-            elapsed = time.time() - inspection_start_time  # 计算当前命令执行耗时
-            remaining = INSPECTION_TASK_TIMEOUT - elapsed  # 计算剩余时间
+            remaining = inspection_deadline - time.time()  # 计算剩余时间
             # 超时检查
             if remaining <= 0:
                 log_message(f'设备 {login_info["host"]} 巡检任务超时，已主动中止', level='error')
@@ -698,32 +874,28 @@ def inspection(login_info, cmds_dict, enable_show_output):
                     # —— 回退策略：不做自动翻页，直接拿一次基础输出 ——
                     try:
                         base_output = ssh.send_command_timing(
-                            _safe_str(cmd), read_timeout=timeout_per_cmd
+                            cmd, read_timeout=timeout_per_cmd
                         )
                     except Exception as e2:
                         log_message(
                             f"设备 {login_info['host']} 基础输出获取也失败：{e2}", level='error'
                         )
                         base_output = ""
-                    show = base_output
+                    show = _safe_str(base_output)
                     # 命令执行完成调试日志
                     if enable_show_output == 'y':
-                        with LOCK:  # 加锁同步控制台输出
-                            log_message(f"[DEBUG] 设备 {login_info['host']} 命令执行完成: {cmd}")
-                # —— 统一把 show 安全规整为字符串，再做后续判断 ——
-                s_show = _safe_str(show)  # 确保show为字符串，防止后续操作出错
+                        log_message(f"[DEBUG] 设备 {login_info['host']} 命令执行完成: {cmd}")
+                # —— handle_pagination 与回退路径均已返回字符串，直接用于后续判断 ——
+                s_show = show
 
                 # 5. 检查命令回显是否为不可识别命令，若是则记录日志并直接continue，不再多余等待
-                if (
-                    "Unrecognized command" in s_show or
-                    "Error: Unrecognized command found at '^' position." in s_show
-                ):
+                if is_unrecognized(s_show):
                     # 安全获取“最后一行”，避免空串 splitlines() 后取 [-1] 抛 IndexError
                     _trimmed = s_show.strip()
                     _lines = _trimmed.splitlines() if _trimmed else []
                     _last = _lines[-1] if _lines else _trimmed
                     log_message(
-                        f"设备 {login_info['host']} 命令 {_safe_str(cmd)} 不兼容或错误：{_last}", level='warning'
+                        f"设备 {login_info['host']} 命令 {cmd} 不兼容或错误：{_last}", level='warning'
                     )
                     continue  # 跳过当前命令，继续下一个
 
@@ -732,19 +904,19 @@ def inspection(login_info, cmds_dict, enable_show_output):
                 # 6. quit 或连接被远端关闭时常见 socket closed，这里记录为info并break  [FIX-INDENT]
                 if "Socket is closed" in str(e):
                     log_message(
-                        f'设备 {login_info["host"]} 命令 {_safe_str(cmd)} 执行后连接已关闭（常见于quit或远端主动断开），后续命令跳过。'
+                        f'设备 {login_info["host"]} 命令 {cmd} 执行后连接已关闭（常见于quit或远端主动断开），后续命令跳过。'
                     )
                 else:
                     log_message(
-                        f'设备 {login_info["host"]} 命令 {_safe_str(cmd)} 执行异常: {type(e).__name__}: {str(e)}', level='error'
+                        f'设备 {login_info["host"]} 命令 {cmd} 执行异常: {type(e).__name__}: {str(e)}', level='error'
                     )
                 break
-            except exceptions.NetmikoTimeoutException as e:
+            except netmiko_exceptions.NetmikoTimeoutException as e:
                 log_message(f'设备 {login_info["host"]} SSH超时异常: {str(e)}', level='error')
                 break
 
             # 7. quit命令特殊处理：如quit后连接断开则break，否则继续后续命令
-            if cmd.strip().lower() == "quit":
+            if cmd_clean.lower() == "quit":
                 if channel_closed(ssh):
                     log_message(f'设备 {login_info["host"]} quit命令后SSH连接断开（如预期），后续命令已跳过。')
                     break
@@ -753,8 +925,7 @@ def inspection(login_info, cmds_dict, enable_show_output):
 
             # 8. 根据用户设置决定是否在控制台显示回显
             if enable_show_output == 'y':
-                with LOCK:  # 加锁同步控制台输出
-                    print(f'{real_hostname} {_safe_str(cmd)} 回显如下：\n{show}\n')
+                echo_message(f'{real_hostname} {cmd} 回显如下：\n{show}\n')
 
     finally:  # 无论登录成功与否，最终执行资源清理
         try:  # 只在SSH对象存在且连接活跃时断开连接,总的资源释放保护（包括ssh.is_alive()和ssh.disconnect()）
@@ -762,8 +933,7 @@ def inspection(login_info, cmds_dict, enable_show_output):
                 try:
                     # 资源释放前调试日志
                     if enable_show_output == 'y':
-                        with LOCK:  # 加锁同步控制台输出
-                            log_message(f"[DEBUG] 设备 {login_info['host']} SSH连接即将关闭")
+                        log_message(f"[DEBUG] 设备 {login_info['host']} SSH连接即将关闭")
                     ssh.disconnect()
                 except OSError as e:
                     if "Socket is closed" in str(e):
@@ -783,24 +953,13 @@ def inspection(login_info, cmds_dict, enable_show_output):
             tb = traceback.format_exc()
             log_message(f"设备 {login_info['host']} finally块内部出现异常: {e}\n{tb}", level='error')
 
-# 自定义守护线程池执行器
-# 继承自ThreadPoolExecutor，重写_worker方法确保所有工作线程为守护线程
-# 解决主线程退出后子线程仍可能残留的问题
-
-class DaemonThreadPoolExecutor(ThreadPoolExecutor):
-    """自定义守护线程池，确保主线程退出时所有子线程随之终止"""
-
-    def _worker(self, *args, **kwargs):
-        thread = threading.current_thread()
-        thread.daemon = True  # 设置为守护线程
-        super()._worker(*args, **kwargs)
-
 
 if __name__ == '__main__':
     # 主线程计时器main_start_time,计算巡检总耗时
     main_start_time = time.time()
     # 读取设备信息和命令配置
     devices_info, cmds_info = read_info()
+    cmds_info = prepare_cmds(cmds_info)  # 按设备类型预清洗命令，只做一次
     # 获取用户输入，是否显示实时命令输出（默认不显示）
     enable_show_output = input("是否显示实时命令输出？(y/n, 默认n): ").strip().lower() or 'n'
 
@@ -808,29 +967,33 @@ if __name__ == '__main__':
     log_message(f'\n' + '>' * 40 + '\n')
 
 
+    # 先校验设备信息必填字段，只为有效设备分配线程
+    valid_devices = []
+    for device_info in devices_info:
+        missing_fields = [f for f in REQUIRED_DEVICE_FIELDS if str(device_info.get(f)).strip() == '']
+        if missing_fields:
+            log_message(f"[跳过] 设备信息字段不完整（缺失: {', '.join(missing_fields)}），设备信息: {device_info}", level='warning')
+            continue
+        valid_devices.append(device_info)
+
+    # 在主线程中加载netmiko，避免多个巡检线程同时首次导入
+    _load_netmiko()
+
     # 线程池配置 - 动态调整大小
     # 1. 获取CPU核心数（处理可能为None的情况，默认使用4核心）
-    # 2. 计算最大工作线程数：设备数量、CPU核心数*5、200的最小值
-    #    确保线程池不会过度消耗系统资源
+    # 2. 计算最大工作线程数：有效设备数量、CPU核心数*5、200的最小值
+    #    确保线程池不会过度消耗系统资源；至少保留1个线程，避免无有效设备时线程池创建失败
     cpu_count = os.cpu_count() or 4  # 处理 None 情况，默认使用 4 核心
-    max_workers = min(len(devices_info), cpu_count * 5, 200)
+    max_workers = max(1, min(len(valid_devices), cpu_count * 5, 200))
 
-    # 使用自定义守护线程池执行巡检任务
+    # 使用标准线程池执行巡检任务（每台设备的总时长由inspection内部的INSPECTION_TASK_TIMEOUT约束）
     # thread_name_prefix用于调试时识别线程来源
-    with DaemonThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='DeviceInspect') as executor:
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='DeviceInspect') as executor:
         futures = []
-        # 遍历所有设备信息，提交巡检任务
-        for device_info in devices_info:
-            # 验证设备信息必填字段
-            required_fields = ['device_type', 'host', 'ip', 'username','port']
-            missing_fields = [f for f in required_fields if str(device_info.get(f)).strip() == '']
-            if missing_fields:
-                log_message(f"[跳过] 设备信息字段不完整（缺失: {', '.join(missing_fields)}），设备信息: {device_info}", level='warning')
-                continue
-
-            # 复制设备信息并添加连接超时配置
-            updated_device_info = device_info.copy()
-            updated_device_info["conn_timeout"] = 15  # 设置连接超时为15秒
+        # 遍历所有有效设备，提交巡检任务
+        for device_info in valid_devices:
+            # 复制设备信息并添加连接超时配置（设备记录需保持为dict，以便直接解包传给ConnectHandler）
+            updated_device_info = dict(device_info, conn_timeout=DEVICE_CONN_TIMEOUT)
 
             # 提交巡检任务到线程池
             # inspection: 实际执行巡检的函数
@@ -860,14 +1023,16 @@ if __name__ == '__main__':
                 tb = traceback.format_exc()
                 log_message(f"设备 {host} 巡检任务异常: {str(e)}\n{tb}", level='error')
 
-    # 统计错误设备数量
+    # 统计错误设备数量（先确保队列中的日志已全部写入01log.log）
+    flush_log_queue()
     try:
         error_devices = set()
         # 读取日志文件，提取错误设备信息
-        with open(os.path.join(LOG_DIR, '01log.log'), 'r', encoding='utf-8') as log_file:
+        with open(ERROR_LOG_FILE, 'r', encoding='utf-8') as log_file:
             for line in log_file:
-                if ERROR_KEYWORDS and any(keyword in line for keyword in ERROR_KEYWORDS):
-                    parts = line.split()
+                if find_error(line):
+                    # 只需前5个字段（日期、时间、级别、'设备'、设备名），限制切分次数，不必把整行消息拆成词列表
+                    parts = line.split(None, 5)
                     # 调整设备名提取逻辑以匹配实际日志格式
                     if len(parts) >= 5 and parts[3] == '设备':
                         error_devices.add(parts[4])
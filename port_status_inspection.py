@@ -6,6 +6,7 @@ import re
 import os
 import sys
 import glob
+import argparse
 
 # 获取脚本所在目录的绝对路径
 def get_base_dir():
@@ -25,6 +26,8 @@ def get_base_dir():
 
 def _safe_str(x) -> str:
     """把 None/NaN/非字符串安全转换为字符串；NaN 返回空串。"""
+    if type(x) is str:  # 绝大多数调用传入的就是字符串，直接返回
+        return x
     if x is None:
         return ""
     if isinstance(x, float):
@@ -37,6 +40,9 @@ def _safe_str(x) -> str:
         return str(x)  # 普通 float 显式转字符串，避免 .strip 报错
     return x if isinstance(x, str) else str(x)
 
+# 控制符（\r \n \t）删除表，str.translate 单次遍历即可移除全部控制符
+_CTRL_TRANS = str.maketrans("", "", "\r\n\t")
+
 def _strip_or_empty(x) -> str:
     """
     字符串清洗：
@@ -46,9 +52,9 @@ def _strip_or_empty(x) -> str:
     """
     if not isinstance(x, str):
         return ""
-    cleaned = x.replace("_x000d_", "")  # 移除 Excel 隐藏回车
-    cleaned = re.sub(r"[\r\n\t]", "", cleaned)  # 移除控制符
-    return cleaned.strip()
+    if "_x000d_" in x:  # 多数单元格不含该标记，先判断可省去一次字符串复制
+        x = x.replace("_x000d_", "")   # 移除 Excel 隐藏回车
+    return x.translate(_CTRL_TRANS).strip()  # 移除控制符并去掉首尾空格
 
 # ==============================================
 # 设备类型检测模块
@@ -62,54 +68,79 @@ def detect_device_type(output: str) -> str:
     返回:
         str: 'huawei'、'h3c'或None(未知类型)
     """
-    lines = output.split('\n')
-    batch_size = 100  # 每次检查100行,平衡性能和准确性
-    
-    for i in range(0, len(lines), batch_size):
-        batch = lines[i:i+batch_size]
-        lower_batch = [line.lower() for line in batch]  # 统一转为小写，便于匹配
-        
-        for line in lower_batch:
-            if 'huawei' in line:
-                return 'huawei'
-            if 'h3c' in line or 'new h3c technologies' in line:
-                return 'h3c'
-    return None
+    lower = output.lower()  # 整体转一次小写，再用 find 扫描，避免逐行切分与复制
+    i_huawei = lower.find('huawei')
+    i_h3c = lower.find('h3c')  # 'new h3c technologies' 同样包含 'h3c'
+    if i_huawei < 0:
+        return 'h3c' if i_h3c >= 0 else None
+    if i_h3c < 0 or i_huawei < i_h3c:
+        return 'huawei'
+    # h3c 先出现：与 huawei 同一行时仍按华为处理（逐行检查时华为优先）
+    return 'huawei' if '\n' not in lower[i_h3c:i_huawei] else 'h3c'
 
 # ==============================================
 # 命令输出解析核心模块
 # ==============================================
 
-def parse_dis_int_brief(output: str, device_type: str) -> Dict[str, Dict]:
-    """
-    解析 display interface brief 命令输出
-    支持H3C和华为设备格式
-    
-    参数:
-        output: 命令输出
-        device_type: 设备类型 ('huawei' 或 'h3c')
-    
-    返回格式：
-        - 华为格式: {port: {"admin_status": "UP/DOWN", "line_status": "UP/DOWN", "phy_status": "UP/DOWN", "protocol_status": "UP/DOWN", "in_uti": "0%", "out_uti": "0%", "in_errors": "0", "out_errors": "0"}}
-        - 华三格式: {port: {"admin_status": "UP/DOWN", "line_status": "UP/DOWN", "link_status": "UP/DOWN/ADM", "protocol_status": "UP/DOWN", "mode": "route/bridge", "speed": "1G(a)", "duplex": "F(a)", "type": "A/T", "pvid": "1", "description": "To_xxx"}}
-    """
-    result = {}
-    
-    # 端口名称映射表，用于将完整名称转换为简写
-    port_name_map = {
-        "GigabitEthernet": "GE",
-        "Ten-GigabitEthernet": "XGE",
-        "XGigabitEthernet": "XGE",
-        "TwentyFiveGigE": "25GE",
-        "FortyGigE": "40GE",
-        "HundredGigE": "100GE",
-        "Eth-Trunk": "Eth-Trunk"
-    }
-    
-    lines = output.split('\n')
+# 解析用正则，模块加载时预编译一次，避免逐行/逐次调用时重复查找 re 缓存
+_LLDP_PORT_PREFIXES = ('GE', 'XGE')  # LLDP 本端口前缀，先用 startswith 快速排除
+_LLDP_PORT_RE = re.compile(r'^(?:GE|XGE)\d+/\d+/\d+$')  # LLDP 本端口：GE/XGE x/x/x
+_STP_RE = re.compile(r'\s*\d+\s+(\w+\d+/\d+/\d+)\s+(\w+)\s+(\w+)', re.IGNORECASE)  # MSTID 端口 角色 状态
+# 通用端口状态解析：华为/H3C "current state"、Cisco "is up"、其他设备
+_HW_PORT_RE = re.compile(r'(\w+\d+/\d+/\d+)\s+current\s+state\s*:\s*(\w+(?:\s+\w+)*)', re.IGNORECASE)
+_CISCO_PORT_RE = re.compile(r'(\w+\d+/\d+/\d+)\s+is\s+(\w+(?:\s+\w+)*)', re.IGNORECASE)
+_GENERIC_PORT_RE = re.compile(r'(\w+\d+[\w/]*\d+)\s+\w+\s+(\w+(?:\s+\w+)*)', re.IGNORECASE)
+# 端口名称映射表，用于将完整名称转换为简写：(完整前缀, 前缀长度, 简写)
+_PORT_NAME_MAP = tuple((full, len(full), short) for full, short in (
+    ("GigabitEthernet", "GE"),
+    ("Ten-GigabitEthernet", "XGE"),
+    ("XGigabitEthernet", "XGE"),
+    ("TwentyFiveGigE", "25GE"),
+    ("FortyGigE", "40GE"),
+    ("HundredGigE", "100GE"),
+    ("Eth-Trunk", "Eth-Trunk"),
+))
+# STP 输出沿用原有的较小映射表（不含 XGigabitEthernet / Eth-Trunk）
+_STP_PORT_NAME_MAP = tuple(item for item in _PORT_NAME_MAP
+                           if item[0] not in ("XGigabitEthernet", "Eth-Trunk"))
+
+def _shorten_port(name: str, name_map: Tuple = _PORT_NAME_MAP) -> str:
+    """把完整端口名的前缀替换为简写，无匹配时原样返回"""
+    for full, n, short in name_map:
+        if name.startswith(full):
+            return short + name[n:]
+    return name
+
+# 端口/STP 状态的常见取值：查表直接返回共享的规范字符串，避免每个端口各分配一份
+# 未收录的取值再回退到 lower()/upper()
+_STATUS_WORDS = ("up", "down", "*down", "adm", "up(s)", "down(s)",
+                 "forwarding", "learning", "discarding", "listening", "blocking",
+                 "desi", "root", "alte", "back", "mast", "disa")
+_LOWER_CANON = {v: w for w in _STATUS_WORDS for v in (w, w.upper(), w.capitalize())}
+_UPPER_CANON = {v: w.upper() for w in _STATUS_WORDS for v in (w, w.upper(), w.capitalize())}
+
+def _lower_status(token: str) -> str:
+    """状态取值转小写，常见取值返回共享对象"""
+    return _LOWER_CANON.get(token) or token.lower()
+
+def _upper_status(token: str) -> str:
+    """状态取值转大写，常见取值返回共享对象"""
+    return _UPPER_CANON.get(token) or token.upper()
+
+# 全局匹配（兼容旧日志）时的状态取值，华为为小写、华三为大写
+_HW_PHY_STATES = frozenset(("up", "down", "*down"))
+_HW_PROTOCOL_STATES = frozenset(("up", "down"))
+_H3C_LINK_STATES = frozenset(("UP", "DOWN", "ADM"))
+_DEVICE_NAME_RE = re.compile(r'\[(.*?)\]')  # 日志文件名中的 [设备名]
+_BASELINE_DATE_RE = re.compile(r'^\d{4}_\d{2}_\d{2}$')  # 基线日期目录 YYYY_MM_DD
+
+# H3C display interface brief 的模式切换行
+_BRIEF_ROUTE_MODE = "Brief information on interfaces in route mode:"
+_BRIEF_BRIDGE_MODE = "Brief information on interfaces in bridge mode:"
+
+def _iter_int_brief_section(lines):
+    """逐行产出 display interface brief 命令输出范围内的非空行（已去除首尾空白）"""
     in_int_brief_section = False
-    current_mode = None  # 用于H3C设备，记录当前是route mode还是bridge mode
-    
     for line in lines:
         line = line.strip()
         
@@ -119,296 +150,313 @@ def parse_dis_int_brief(output: str, device_type: str) -> Dict[str, Dict]:
             continue
         
         # 遇到下一个命令时，结束当前解析
-        if in_int_brief_section and line.startswith('<') and '>' in line and 'dis' in line:
-            break
+        # 首字符不是 '<' 的行直接跳过后续检查（绝大多数数据行）
+        if line[:1] == '<' and in_int_brief_section and '>' in line and 'dis' in line:
+            return
         
-        # 只处理display interface brief命令的输出内容
-        if in_int_brief_section:
-            # 处理H3C的模式切换
-            if "Brief information on interfaces in route mode:" in line:
-                current_mode = "route"
-                continue
-            elif "Brief information on interfaces in bridge mode:" in line:
-                current_mode = "bridge"
-                continue
-            
-            # 跳过空行
-            if not line:
-                continue
-            
-            # 华为格式解析
-            if device_type == "huawei":
-                # 跳过标题行
-                if "PHY" in line or "Protocol" in line or "InUti" in line or "Interface" in line:
+        # 只产出display interface brief命令的输出内容，跳过空行
+        if in_int_brief_section and line:
+            yield line
+
+def _parse_huawei_brief(section) -> Dict[str, Dict]:
+    """解析华为 display interface brief 输出范围内的行"""
+    result = {}
+    for line in section:
+        # 跳过华三模式切换行和标题行
+        if _BRIEF_ROUTE_MODE in line or _BRIEF_BRIDGE_MODE in line:
+            continue
+        if "PHY" in line or "Protocol" in line or "InUti" in line or "Interface" in line:
+            continue
+        
+        # 处理华为格式的端口状态行：接口 PHY Protocol InUti OutUti [inErrors outErrors ...]
+        # 无参 split() 已去掉所有空白；行已 strip，子接口行与主接口行格式相同
+        try:
+            full_port, phy_status, protocol_status, in_uti, out_uti, *rest = line.split()
+        except ValueError:
+            continue  # 不足5列，非端口状态行
+        if not rest:
+            continue  # 至少需要6列
+        phy_status = _lower_status(phy_status)
+        protocol_status = _lower_status(protocol_status)
+        
+        # 转换为简写格式
+        port = _shorten_port(full_port)
+        
+        # 判断管理状态和链路状态
+        if phy_status == "*down":
+            admin_status = "DOWN"
+            line_status = "DOWN"
+        elif phy_status == "down":
+            admin_status = "UP"
+            line_status = "DOWN"
+        else:
+            admin_status = "UP"
+            line_status = "UP" if protocol_status == "up" else "DOWN"
+        
+        # 构建华为格式端口信息字典（不少于8列时才带错误计数）
+        has_errors = len(rest) >= 3
+        port_info = {
+            "admin_status": admin_status,
+            "line_status": line_status,
+            "phy_status": phy_status,
+            "protocol_status": protocol_status,
+            "in_uti": in_uti,
+            "out_uti": out_uti,
+            "in_errors": rest[0] if has_errors else "0",
+            "out_errors": rest[1] if has_errors else "0"
+        }
+        
+        result[port] = port_info
+    return result
+
+def _parse_h3c_brief(section) -> Dict[str, Dict]:
+    """解析华三 display interface brief 输出范围内的行，按 route/bridge 模式区分格式"""
+    result = {}
+    current_mode = None  # 记录当前是route mode还是bridge mode
+    for line in section:
+        # 处理模式切换行
+        if _BRIEF_ROUTE_MODE in line:
+            current_mode = "route"
+            continue
+        elif _BRIEF_BRIDGE_MODE in line:
+            current_mode = "bridge"
+            continue
+        
+        # 跳过标题行和说明行
+        if "Link:" in line or "Speed:" in line or "Duplex:" in line or "Type:" in line:
+            continue
+        
+        # 处理H3C路由模式格式
+        if current_mode == "route":
+            parts = line.split()
+            n = len(parts)
+            if n >= 3:
+                port = parts[0]
+                # 跳过表头行
+                if port == "Interface":
                     continue
+                link_status = _upper_status(parts[1])
+                protocol_status = _upper_status(parts[2])
                 
-                # 处理华为格式的端口状态行
-                parts = line.split()
-                if len(parts) >= 5:
-                    # 处理缩进的子接口
-                    if line.startswith('  ') and len(parts) >= 5:
-                        full_port = parts[0]
-                        phy_status = parts[1].strip().lower()
-                        protocol_status = parts[2].strip().lower()
-                        in_uti = parts[3].strip()
-                        out_uti = parts[4].strip()
-                    elif len(parts) >= 6:
-                        # 主接口行
-                        full_port = parts[0]
-                        phy_status = parts[1].strip().lower()
-                        protocol_status = parts[2].strip().lower()
-                        in_uti = parts[3].strip()
-                        out_uti = parts[4].strip()
-                    else:
-                        continue
-                    
-                    # 转换为简写格式
-                    port = full_port
-                    for full, short in port_name_map.items():
-                        if full_port.startswith(full):
-                            port = full_port.replace(full, short)
-                            break
-                    
-                    # 判断管理状态和链路状态
-                    if phy_status == "*down":
-                        admin_status = "DOWN"
-                        line_status = "DOWN"
-                    elif phy_status == "down":
-                        admin_status = "UP"
-                        line_status = "DOWN"
-                    else:
-                        admin_status = "UP"
-                        line_status = "UP" if protocol_status == "up" else "DOWN"
-                    
-                    # 构建华为格式端口信息字典
-                    port_info = {
-                        "admin_status": admin_status,
-                        "line_status": line_status,
-                        "phy_status": phy_status,
-                        "protocol_status": protocol_status,
-                        "in_uti": in_uti,
-                        "out_uti": out_uti,
-                        "in_errors": parts[5] if len(parts) >= 8 else "0",
-                        "out_errors": parts[6] if len(parts) >= 8 else "0"
-                    }
-                    
-                    result[port] = port_info
-            
-            # H3C格式解析
-            elif device_type == "h3c":
-                # 处理模式切换行
-                if "Brief information on interfaces in route mode:" in line:
-                    current_mode = "route"
-                    continue
-                elif "Brief information on interfaces in bridge mode:" in line:
-                    current_mode = "bridge"
-                    continue
+                # 判断管理状态和链路状态
+                if link_status == "ADM" or link_status == "DOWN":
+                    admin_status = "DOWN" if link_status == "ADM" else "UP"
+                    line_status = "DOWN"
+                else:
+                    admin_status = "UP"
+                    line_status = "UP"
                 
-                # 跳过标题行和说明行
-                if "Link:" in line or "Speed:" in line or "Duplex:" in line or "Type:" in line:
-                    continue
+                # 构建华三格式端口信息字典
+                port_info = {
+                    "admin_status": admin_status,
+                    "line_status": line_status,
+                    "link_status": link_status,
+                    "protocol_status": protocol_status,
+                    "mode": current_mode
+                }
                 
-                # 跳过空行
-                if not line:
+                # 添加路由模式特有字段
+                if n >= 4:
+                    port_info["primary_ip"] = parts[3] if parts[3] != "--" else ""
+                if n >= 5:
+                    port_info["description"] = " ".join(parts[4:])
+                
+                result[port] = port_info
+        
+        # 处理H3C桥接模式格式
+        elif current_mode == "bridge":
+            parts = line.split()
+            n = len(parts)
+            if n >= 6:
+                port = parts[0]
+                # 跳过表头行
+                if port == "Interface":
                     continue
+                link_status = _upper_status(parts[1])
                 
-                # 处理H3C路由模式格式
-                if current_mode == "route":
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        port = parts[0]
-                        # 跳过表头行
-                        if port == "Interface":
-                            continue
-                        link_status = parts[1].strip().upper()
-                        protocol_status = parts[2].strip().upper()
-                        
-                        # 判断管理状态和链路状态
-                        if link_status == "ADM" or link_status == "DOWN":
-                            admin_status = "DOWN" if link_status == "ADM" else "UP"
-                            line_status = "DOWN"
-                        else:
-                            admin_status = "UP"
-                            line_status = "UP"
-                        
-                        # 构建华三格式端口信息字典
-                        port_info = {
-                            "admin_status": admin_status,
-                            "line_status": line_status,
-                            "link_status": link_status,
-                            "protocol_status": protocol_status,
-                            "mode": current_mode
-                        }
-                        
-                        # 添加路由模式特有字段
-                        if len(parts) >= 4:
-                            port_info["primary_ip"] = parts[3] if parts[3] != "--" else ""
-                        if len(parts) >= 5:
-                            port_info["description"] = " ".join(parts[4:])
-                        
-                        result[port] = port_info
+                # 判断管理状态和链路状态
+                if link_status == "ADM" or link_status == "DOWN":
+                    admin_status = "DOWN" if link_status == "ADM" else "UP"
+                    line_status = "DOWN"
+                else:
+                    admin_status = "UP"
+                    line_status = "UP"
                 
-                # 处理H3C桥接模式格式
-                elif current_mode == "bridge":
-                    parts = line.split()
-                    if len(parts) >= 6:
-                        port = parts[0]
-                        # 跳过表头行
-                        if port == "Interface":
-                            continue
-                        link_status = parts[1].strip().upper()
-                        
-                        # 判断管理状态和链路状态
-                        if link_status == "ADM" or link_status == "DOWN":
-                            admin_status = "DOWN" if link_status == "ADM" else "UP"
-                            line_status = "DOWN"
-                        else:
-                            admin_status = "UP"
-                            line_status = "UP"
-                        
-                        # 构建华三格式端口信息字典
-                        port_info = {
-                            "admin_status": admin_status,
-                            "line_status": line_status,
-                            "link_status": link_status,
-                            "protocol_status": "UP" if link_status == "UP" else "DOWN",
-                            "mode": current_mode,
-                            "speed": parts[2] if len(parts) > 2 else "",
-                            "duplex": parts[3] if len(parts) > 3 else "",
-                            "type": parts[4] if len(parts) > 4 else "",
-                            "pvid": parts[5] if len(parts) > 5 else ""
-                        }
-                        
-                        # 添加桥接模式特有字段
-                        if len(parts) > 6:
-                            port_info["description"] = " ".join(parts[6:])
-                        
-                        result[port] = port_info
+                # 构建华三格式端口信息字典
+                port_info = {
+                    "admin_status": admin_status,
+                    "line_status": line_status,
+                    "link_status": link_status,
+                    "protocol_status": "UP" if link_status == "UP" else "DOWN",
+                    "mode": current_mode,
+                    "speed": parts[2] if n > 2 else "",
+                    "duplex": parts[3] if n > 3 else "",
+                    "type": parts[4] if n > 4 else "",
+                    "pvid": parts[5] if n > 5 else ""
+                }
                 
-                # 如果没有明确的mode，尝试自动检测
-                else:
-                    # 跳过表头行
-                    if line.startswith("Interface"):
-                        continue
-                    
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        port = parts[0]
-                        # 跳过表头行
-                        if port == "Interface":
-                            continue
-                        link_status = parts[1].strip().upper()
-                        
-                        # 判断管理状态和链路状态
-                        if link_status == "ADM":
-                            admin_status = "DOWN"
-                            line_status = "DOWN"
-                        elif link_status == "DOWN":
-                            admin_status = "UP"
-                            line_status = "DOWN"
-                        else:
-                            admin_status = "UP"
-                            line_status = "UP"
-                        
-                        # 构建华三格式端口信息字典
-                        port_info = {
-                            "admin_status": admin_status,
-                            "line_status": line_status,
-                            "link_status": link_status,
-                            "protocol_status": parts[2].strip().upper() if len(parts) >= 3 else "DOWN"
-                        }
-                        
-                        result[port] = port_info
-    
-    # 如果没有找到 display interface brief 命令的开始行，尝试全局匹配（兼容旧版本日志）
-    if not result:
-        for line in lines:
-            line = line.strip()
-            
-            # 跳过标题行、空行和其他命令行
-            if not line or "Interface" in line or "PHY:" in line or "Link:" in line or "InUti" in line or "Brief information" in line:
+                # 添加桥接模式特有字段
+                if n > 6:
+                    port_info["description"] = " ".join(parts[6:])
+                
+                result[port] = port_info
+        
+        # 如果没有明确的mode，尝试自动检测
+        else:
+            # 跳过表头行
+            if line.startswith("Interface"):
                 continue
             
-            # 尝试华为格式匹配
             parts = line.split()
-            if len(parts) >= 6:
-                if parts[1] in ["up", "down", "*down"] and parts[2] in ["up", "down"]:
-                    full_port = parts[0]
-                    # 转换为简写格式
-                    port = full_port
-                    for full, short in port_name_map.items():
-                        if full_port.startswith(full):
-                            port = full_port.replace(full, short)
-                            break
-                    # 提取状态信息
-                    phy_status = parts[1].strip().lower()
-                    protocol_status = parts[2].strip().lower()
-                    in_uti = parts[3].strip()
-                    out_uti = parts[4].strip()
-                    
-                    # 判断管理状态和链路状态
-                    if phy_status == "*down":
-                        admin_status = "DOWN"
-                        line_status = "DOWN"
-                    elif phy_status == "down":
-                        admin_status = "UP"
-                        line_status = "DOWN"
-                    else:
-                        admin_status = "UP"
-                        line_status = "UP" if protocol_status == "up" else "DOWN"
-                    
-                    # 构建华为格式端口信息字典
-                    port_info = {
-                        "admin_status": admin_status,
-                        "line_status": line_status,
-                        "phy_status": phy_status,
-                        "protocol_status": protocol_status,
-                        "in_uti": in_uti,
-                        "out_uti": out_uti,
-                        "in_errors": parts[5] if len(parts) >= 8 else "0",
-                        "out_errors": parts[6] if len(parts) >= 8 else "0"
-                    }
-                    
-                    result[port] = port_info
+            n = len(parts)
+            if n >= 4:
+                port = parts[0]
+                # 跳过表头行
+                if port == "Interface":
+                    continue
+                link_status = _upper_status(parts[1])
+                
+                # 判断管理状态和链路状态
+                if link_status == "ADM":
+                    admin_status = "DOWN"
+                    line_status = "DOWN"
+                elif link_status == "DOWN":
+                    admin_status = "UP"
+                    line_status = "DOWN"
+                else:
+                    admin_status = "UP"
+                    line_status = "UP"
+                
+                # 构建华三格式端口信息字典
+                port_info = {
+                    "admin_status": admin_status,
+                    "line_status": line_status,
+                    "link_status": link_status,
+                    "protocol_status": _upper_status(parts[2]) if n >= 3 else "DOWN"
+                }
+                
+                result[port] = port_info
+    return result
+
+def _parse_brief_fallback(lines) -> Dict[str, Dict]:
+    """未找到 display interface brief 命令开始行时的全局匹配（兼容旧版本日志）"""
+    result = {}
+    for line in lines:
+        line = line.strip()
+        
+        # 跳过标题行、空行和其他命令行
+        if not line or "Interface" in line or "PHY:" in line or "Link:" in line or "InUti" in line or "Brief information" in line:
+            continue
+        
+        parts = line.split()  # 只切分一次，华为/华三两种格式共用
+        n = len(parts)
+        
+        # 尝试华为格式匹配
+        if n >= 6 and parts[1] in _HW_PHY_STATES and parts[2] in _HW_PROTOCOL_STATES:
+            full_port = parts[0]
+            # 转换为简写格式
+            port = _shorten_port(full_port)
+            # 提取状态信息
+            phy_status = _lower_status(parts[1])
+            protocol_status = _lower_status(parts[2])
+            in_uti = parts[3]
+            out_uti = parts[4]
             
-            # 尝试H3C格式匹配
-            parts = line.split()
-            if len(parts) >= 4:
-                if parts[1] in ["UP", "DOWN", "ADM"]:
-                    port = parts[0]
-                    link_status = parts[1].strip().upper()
-                    
-                    # 判断管理状态和链路状态
-                    if link_status == "ADM":
-                        admin_status = "DOWN"
-                        line_status = "DOWN"
-                    elif link_status == "DOWN":
-                        admin_status = "UP"
-                        line_status = "DOWN"
-                    else:
-                        admin_status = "UP"
-                        line_status = "UP"
-                    
-                    # 构建华三格式端口信息字典
-                    port_info = {
-                        "admin_status": admin_status,
-                        "line_status": line_status,
-                        "link_status": link_status,
-                        "protocol_status": parts[2].strip().upper() if len(parts) >= 3 else "DOWN"
-                    }
-                    
-                    result[port] = port_info
+            # 判断管理状态和链路状态
+            if phy_status == "*down":
+                admin_status = "DOWN"
+                line_status = "DOWN"
+            elif phy_status == "down":
+                admin_status = "UP"
+                line_status = "DOWN"
+            else:
+                admin_status = "UP"
+                line_status = "UP" if protocol_status == "up" else "DOWN"
+            
+            # 构建华为格式端口信息字典
+            port_info = {
+                "admin_status": admin_status,
+                "line_status": line_status,
+                "phy_status": phy_status,
+                "protocol_status": protocol_status,
+                "in_uti": in_uti,
+                "out_uti": out_uti,
+                "in_errors": parts[5] if n >= 8 else "0",
+                "out_errors": parts[6] if n >= 8 else "0"
+            }
+            
+            result[port] = port_info
+        
+        # 尝试H3C格式匹配（状态大小写与华为不同，两者互斥）
+        elif n >= 4 and parts[1] in _H3C_LINK_STATES:
+            port = parts[0]
+            link_status = _upper_status(parts[1])
+            
+            # 判断管理状态和链路状态
+            if link_status == "ADM":
+                admin_status = "DOWN"
+                line_status = "DOWN"
+            elif link_status == "DOWN":
+                admin_status = "UP"
+                line_status = "DOWN"
+            else:
+                admin_status = "UP"
+                line_status = "UP"
+            
+            # 构建华三格式端口信息字典
+            port_info = {
+                "admin_status": admin_status,
+                "line_status": line_status,
+                "link_status": link_status,
+                "protocol_status": _upper_status(parts[2]) if n >= 3 else "DOWN"
+            }
+            
+            result[port] = port_info
+    return result
+
+# 各厂商的 display interface brief 解析函数，按设备类型一次性选定，避免逐行判断
+_BRIEF_PARSERS = {
+    "huawei": _parse_huawei_brief,
+    "h3c": _parse_h3c_brief,
+}
+
+def parse_dis_int_brief(output: str, device_type: str, lines: List[str] = None) -> Dict[str, Dict]:
+    """
+    解析 display interface brief 命令输出
+    支持H3C和华为设备格式
+    
+    参数:
+        output: 命令输出
+        device_type: 设备类型 ('huawei' 或 'h3c')
+        lines: 已切分好的行列表(可选)，由 parse_all 传入以复用同一次切分
+    
+    返回格式：
+        - 华为格式: {port: {"admin_status": "UP/DOWN", "line_status": "UP/DOWN", "phy_status": "UP/DOWN", "protocol_status": "UP/DOWN", "in_uti": "0%", "out_uti": "0%", "in_errors": "0", "out_errors": "0"}}
+        - 华三格式: {port: {"admin_status": "UP/DOWN", "line_status": "UP/DOWN", "link_status": "UP/DOWN/ADM", "protocol_status": "UP/DOWN", "mode": "route/bridge", "speed": "1G(a)", "duplex": "F(a)", "type": "A/T", "pvid": "1", "description": "To_xxx"}}
+    """
+    if lines is None:
+        lines = output.splitlines()
+    
+    # 按设备类型解析命令输出范围内的行，其他设备类型直接走全局匹配
+    parser = _BRIEF_PARSERS.get(device_type)
+    result = parser(_iter_int_brief_section(lines)) if parser else {}
+    
+    # 如果没有找到 display interface brief 命令的开始行，尝试全局匹配（兼容旧版本日志）
+    if not result:
+        result = _parse_brief_fallback(lines)
     
     return result
 
-def parse_dis_lldp_neighbor(output: str) -> Dict[str, Dict]:
+def parse_dis_lldp_neighbor(output: str, lines: List[str] = None) -> Dict[str, Dict]:
     """
     解析 display lldp neighbor list 或 display lldp neighbor brief 命令输出
     支持H3C和华为设备格式
+    lines 为已切分好的行列表(可选)，由 parse_all 传入以复用同一次切分
     返回格式：{port: {"has_neighbor": True/False, "neighbor_dev": "设备名称", "neighbor_port": "端口号"}}
     """
     result = {}
-    lines = output.split('\n')
+    if lines is None:
+        lines = output.splitlines()
     in_lldp_list_section = False
     is_huawei_format = False  # 标记是否为华为格式
     
@@ -431,25 +479,19 @@ def parse_dis_lldp_neighbor(output: str) -> Dict[str, Dict]:
             if parts:
                 local_if = parts[0]
                 
-                # 只处理GE和XGE类型的端口
-                if re.match(r'^(?:GE|XGE)\d+/\d+/\d+$', local_if):
-                    neighbor_info = {
-                        "has_neighbor": True,
-                        "neighbor_dev": "",
-                        "neighbor_port": ""
-                    }
-                    
+                # 只处理GE和XGE类型的端口（前缀不符直接跳过正则）
+                if local_if.startswith(_LLDP_PORT_PREFIXES) and _LLDP_PORT_RE.match(local_if):
+                    # 华为格式：Local Intf   Neighbor Dev             Neighbor Intf             Exptime(s)
+                    # H3C格式：LocalIf         Nbr chassis ID  Nbr Port ID          Nbr System Name
+                    # 字段不足4列时仅记录有邻居，设备和端口留空
                     if len(parts) >= 4:
-                        if is_huawei_format:
-                            # 华为格式：Local Intf   Neighbor Dev             Neighbor Intf             Exptime(s)
-                            neighbor_info["neighbor_dev"] = parts[1]
-                            neighbor_info["neighbor_port"] = parts[2]
-                        else:
-                            # H3C格式：LocalIf         Nbr chassis ID  Nbr Port ID          Nbr System Name
-                            neighbor_info["neighbor_dev"] = parts[3]
-                            neighbor_info["neighbor_port"] = parts[2]
-                    
-                    result[local_if] = neighbor_info
+                        result[local_if] = {
+                            "has_neighbor": True,
+                            "neighbor_dev": parts[1] if is_huawei_format else parts[3],
+                            "neighbor_port": parts[2]
+                        }
+                    else:
+                        result[local_if] = {"has_neighbor": True, "neighbor_dev": "", "neighbor_port": ""}
         
         # 遇到空行或命令提示符，结束LLDP列表部分
         if in_lldp_list_section and (not line or '<' in line and '>' in line):
@@ -457,30 +499,25 @@ def parse_dis_lldp_neighbor(output: str) -> Dict[str, Dict]:
     
     return result
 
-def parse_dis_stp_brief(output: str) -> Dict[str, Dict]:
+def parse_dis_stp_brief(output: str, lines: List[str] = None) -> Dict[str, Dict]:
     """
     解析 display stp brief 命令输出
     支持H3C和华为设备格式
+    lines 为已切分好的行列表(可选)，由 parse_all 传入以复用同一次切分
     返回格式：{port: {"role": "DESI/ROOT/ALTE/BACK", "stp_state": "FORWARDING/LEARNING/DISCARDING"}}
     """
     result = {}
     
-    # 端口名称映射表，用于将完整名称转换为简写
-    port_name_map = {
-        "GigabitEthernet": "GE",
-        "Ten-GigabitEthernet": "XGE",
-        "TwentyFiveGigE": "25GE",
-        "FortyGigE": "40GE",
-        "HundredGigE": "100GE"
-    }
-    
     # 匹配STP状态行
     stp_lines = []
     # 找到STP brief输出的开始行
     in_stp_section = False
-    for line in output.split('\n'):
+    if lines is None:
+        lines = output.splitlines()
+    for line in lines:
         line = line.strip()
-        if "MST ID   Port" in line or "MSTID   Port" in line:
+        # 表头行以 MST 开头，首字符不是 'M' 的行无需再做子串查找
+        if line[:1] == 'M' and ("MST ID   Port" in line or "MSTID   Port" in line):
             in_stp_section = True
             continue
         if in_stp_section and line:
@@ -497,21 +534,16 @@ def parse_dis_stp_brief(output: str) -> Dict[str, Dict]:
         
         # 使用正则表达式匹配STP状态行，处理不同设备的格式差异
         # 匹配MSTID、端口名、角色、STP状态
-        stp_pattern = r'\s*\d+\s+(\w+\d+/\d+/\d+)\s+(\w+)\s+(\w+)'
-        match = re.match(stp_pattern, line, re.IGNORECASE)
+        match = _STP_RE.match(line)
         if match:
             full_port = match.group(1)
-            role = match.group(2).upper()  # 角色转换为大写
-            stp_state = match.group(3).upper()  # STP状态转换为大写
+            role = _upper_status(match.group(2))  # 角色转换为大写
+            stp_state = _upper_status(match.group(3))  # STP状态转换为大写
             
             # 只接受有效的STP状态
             if stp_state in ["FORWARDING", "LEARNING", "DISCARDING", "LISTENING", "BLOCKING"]:
                 # 将完整端口名转换为简写格式
-                short_port = full_port
-                for full, short in port_name_map.items():
-                    if full_port.startswith(full):
-                        short_port = full_port.replace(full, short)
-                        break
+                short_port = _shorten_port(full_port, _STP_PORT_NAME_MAP)
                 # 返回包含角色和状态的字典
                 result[short_port] = {
                     "role": role,
@@ -524,6 +556,13 @@ def parse_dis_stp_brief(output: str) -> Dict[str, Dict]:
 # 命令解析调度模块
 # ==============================================
 
+# 命令关键字 -> 解析函数(统一为 (output, device_type) 调用)，按顺序匹配首个命中项
+_CMD_PARSERS = (
+    (("dis int brief", "display interface brief"), parse_dis_int_brief),
+    (("dis lldp n", "display lldp neighbor"), lambda output, device_type: parse_dis_lldp_neighbor(output)),
+    (("dis stp brief", "display stp brief"), lambda output, device_type: parse_dis_stp_brief(output)),
+)
+
 def parse_port_status(output: str, device_type: str, cmd: str) -> Dict:
     """
     根据命令类型解析端口状态信息
@@ -531,57 +570,64 @@ def parse_port_status(output: str, device_type: str, cmd: str) -> Dict:
     """
     cmd_clean = _strip_or_empty(cmd).lower()
     
-    if "dis int brief" in cmd_clean or "display interface brief" in cmd_clean:
-        return parse_dis_int_brief(output, device_type)
-    elif "dis lldp n" in cmd_clean or "display lldp neighbor" in cmd_clean:
-        return parse_dis_lldp_neighbor(output)
-    elif "dis stp brief" in cmd_clean or "display stp brief" in cmd_clean:
-        return parse_dis_stp_brief(output)
-    else:
-        # 原始解析逻辑，用于其他命令
-        ports = []
-        # 华为/H3C设备解析逻辑
-        if device_type in ['huawei', 'h3c', 'hp_comware']:
-            port_pattern = r'(\w+\d+/\d+/\d+)\s+current\s+state\s*:\s*(\w+(?:\s+\w+)*)'
-            matches = re.finditer(port_pattern, output, re.IGNORECASE)
-            
-            for match in matches:
-                port = match.group(1)
-                status = match.group(2).strip().upper()
-                ports.append({
-                    'port': port,
-                    'status': status,
-                    'description': ''
-                })
+    for keywords, parser in _CMD_PARSERS:
+        for keyword in keywords:
+            if keyword in cmd_clean:
+                return parser(output, device_type)
+    
+    # 原始解析逻辑，用于其他命令
+    ports = []
+    # 华为/H3C设备解析逻辑
+    if device_type in ['huawei', 'h3c', 'hp_comware']:
+        matches = _HW_PORT_RE.finditer(output)
         
-        # Cisco设备解析逻辑
-        elif device_type in ['cisco_ios', 'cisco_xe']:
-            port_pattern = r'(\w+\d+/\d+/\d+)\s+is\s+(\w+(?:\s+\w+)*)'
-            matches = re.finditer(port_pattern, output, re.IGNORECASE)
-            
-            for match in matches:
-                port = match.group(1)
-                status = match.group(2).split(',')[0].strip().upper()
-                ports.append({
-                    'port': port,
-                    'status': status,
-                    'description': ''
-                })
+        for match in matches:
+            port = match.group(1)
+            status = match.group(2).strip().upper()
+            ports.append({
+                'port': port,
+                'status': status,
+                'description': ''
+            })
+    
+    # Cisco设备解析逻辑
+    elif device_type in ['cisco_ios', 'cisco_xe']:
+        matches = _CISCO_PORT_RE.finditer(output)
         
-        # 其他设备类型
-        else:
-            port_pattern = r'(\w+\d+[\w/]*\d+)\s+\w+\s+(\w+(?:\s+\w+)*)'
-            matches = re.finditer(port_pattern, output, re.IGNORECASE)
-            
-            for match in matches:
-                port = match.group(1)
-                status = match.group(2).strip().upper()
-                ports.append({
-                    'port': port,
-                    'status': status,
-                    'description': ''
-                })
-        return ports
+        for match in matches:
+            port = match.group(1)
+            status = match.group(2).split(',')[0].strip().upper()
+            ports.append({
+                'port': port,
+                'status': status,
+                'description': ''
+            })
+    
+    # 其他设备类型
+    else:
+        matches = _GENERIC_PORT_RE.finditer(output)
+        
+        for match in matches:
+            port = match.group(1)
+            status = match.group(2).strip().upper()
+            ports.append({
+                'port': port,
+                'status': status,
+                'description': ''
+            })
+    return ports
+
+def parse_all(output: str, device_type: str) -> Dict[str, Dict]:
+    """
+    一次切分日志内容，依次解析接口状态、STP状态和LLDP邻居
+    返回格式：{"port_status": {...}, "stp_status": {...}, "lldp_status": {...}}
+    """
+    lines = output.splitlines()  # 三个解析函数共用同一份行列表
+    return {
+        "port_status": parse_dis_int_brief(output, device_type, lines),
+        "stp_status": parse_dis_stp_brief(output, lines),
+        "lldp_status": parse_dis_lldp_neighbor(output, lines)
+    }
 
 # ==============================================
 # 测试模块
@@ -593,11 +639,24 @@ def get_device_name(file_path):
     例如：从"内网[区局核心交换机1]_[2025_12_12].log"提取"区局核心交换机1"
     """
     file_name = os.path.basename(file_path)
-    match = re.match(r'\[(.*?)\]', file_name)
+    match = _DEVICE_NAME_RE.match(file_name)
     if match:
         return match.group(1)
     return file_name
 
+def decode_log_bytes(data) -> str:
+    """
+    按 UTF-8 解码日志内容(bytes 或 mmap 等缓冲区对象)
+    个别设备回显夹杂非 UTF-8 字节时以替换符代替，不中断解析
+    """
+    return str(data, 'utf-8', 'replace')
+
+def read_log_text(file_path) -> str:
+    """一次性读入整个日志文件并解码"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return decode_log_bytes(data)
+
 def parse_log_file(file_path):
     """
     解析单个日志文件
@@ -606,16 +665,18 @@ def parse_log_file(file_path):
     print(f"\n=== 测试设备: {device_name} ===")
     
     # 读取日志文件内容
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = read_log_text(file_path)
     
     # 检测设备类型
     device_type = detect_device_type(content)
     print(f"\n--- 设备类型检测结果: {device_type} ---")
     
+    # 一次切分，三个解析函数共用
+    parsed = parse_all(content, device_type)
+    
     # 测试parse_dis_int_brief函数
     print("\n--- parse_dis_int_brief 函数测试结果 ---")
-    int_result = parse_dis_int_brief(content, device_type)
+    int_result = parsed["port_status"]
     if int_result:
         for port, status in int_result.items():
             print(f"  {port}: {status}")
@@ -624,7 +685,7 @@ def parse_log_file(file_path):
     
     # 测试parse_dis_lldp_neighbor函数
     print("\n--- parse_dis_lldp_neighbor 函数测试结果 ---")
-    lldp_result = parse_dis_lldp_neighbor(content)
+    lldp_result = parsed["lldp_status"]
     if lldp_result:
         for port, info in lldp_result.items():
             if info["has_neighbor"]:
@@ -636,7 +697,7 @@ def parse_log_file(file_path):
     
     # 测试parse_dis_stp_brief函数
     print("\n--- parse_dis_stp_brief 函数测试结果 ---")
-    stp_result = parse_dis_stp_brief(content)
+    stp_result = parsed["stp_status"]
     if stp_result:
         for port, info in stp_result.items():
             print(f"  {port}: 角色={info['role']}, 状态={info['stp_state']}")
@@ -674,19 +735,59 @@ def main():
 # ==============================================
 import json
 import time
+import hashlib
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+
+# 预读基线日志的线程数：日志以 mmap 映射，blake2b 计算摘要时释放 GIL，
+# 摘要计算及其触发的映射页换入可与其他线程重叠；解码和解析仍受 GIL 限制，只能串行
+_STATUS_PREFETCH_WORKERS = 8
+
+# 一致性检查结果缓存的格式版本，缓存文件结构变化时递增以废弃旧缓存
+# （解析器和检查逻辑的改动由 _code_fingerprint() 自动体现在缓存键中，无需手动递增）
+_CONSISTENCY_CACHE_VERSION = 1
+
+def _code_fingerprint():
+    """
+    本模块源文件内容的摘要，作为一致性检查缓存键的一部分：
+    任何解析器或检查逻辑的修改（包括重新打包的新版本）都会自动使旧缓存失效
+    源文件不可读时退回到打包程序的修改时间和大小，都取不到时返回 None（不使用缓存）
+    """
+    try:
+        with open(__file__, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except (NameError, OSError):
+        pass
+    if getattr(sys, 'frozen', False):
+        try:
+            st = os.stat(sys.executable)
+            return f"exe:{st.st_mtime_ns}:{st.st_size}"
+        except OSError:
+            pass
+    return None
 
 class BaselineManager:
     def __init__(self, baseline_root="baseline"):
         """初始化基线管理器"""
         self.baseline_root = baseline_root
         self.index_file = os.path.join(baseline_root, "baseline_index.json")
+        self.consistency_cache_file = os.path.join(baseline_root, ".consistency_cache.json")
+        # 基线日期 -> (设备日志列表, {设备名: 设备日志})，每个基线目录只扫描一次
+        self._devices_cache = {}
+        # 日志路径 -> ((mtime_ns, size), 设备状态)，文件未变化时直接复用解析结果
+        self._status_cache = {}
+        # 日志内容摘要 -> 设备状态，相邻两次基线日志内容完全相同时直接共用解析结果
+        self._content_cache = {}
         self.load_index()
     
     def load_index(self):
         """加载或初始化基线索引"""
+        # 磁盘上索引文件的原文，内容未变化时 save_index 据此跳过重写
+        self._saved_index_text = None
         if os.path.exists(self.index_file):
             with open(self.index_file, "r") as f:
-                self.index = json.load(f)
+                self._saved_index_text = f.read()
+            self.index = json.loads(self._saved_index_text)
         else:
             self.index = {
                 "latest_baseline": None,
@@ -699,19 +800,28 @@ class BaselineManager:
         # 确保基线根目录存在
         if not os.path.exists(self.baseline_root):
             os.makedirs(self.baseline_root)
-        with open(self.index_file, "w") as f:
-            json.dump(self.index, f, indent=2, ensure_ascii=False)
+        index_text = json.dumps(self.index, indent=2, ensure_ascii=False)
+        # 与上次加载/写入的内容相同则无需重写
+        if index_text == self._saved_index_text and os.path.exists(self.index_file):
+            return
+        # 先写临时文件再整体替换，避免中途中断留下半截索引
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.write(index_text)
+        os.replace(tmp_file, self.index_file)
+        self._saved_index_text = index_text
     
     def get_baseline_dates(self):
         """获取所有基线时间文件夹，按时间排序"""
         dates = []
-        if not os.path.exists(self.baseline_root):
-            return dates
-        
-        for item in os.listdir(self.baseline_root):
-            item_path = os.path.join(self.baseline_root, item)
-            if os.path.isdir(item_path) and re.match(r'^\d{4}_\d{2}_\d{2}$', item):
-                dates.append(item)
+        # scandir 的目录项自带类型信息，先匹配名称再判断目录，避免逐项 stat
+        try:
+            with os.scandir(self.baseline_root) as entries:
+                for entry in entries:
+                    if _BASELINE_DATE_RE.match(entry.name) and entry.is_dir():
+                        dates.append(entry.name)
+        except FileNotFoundError:
+            return dates  # 基线根目录不存在
         # 按时间排序，最新的在最后
         return sorted(dates)
     
@@ -720,40 +830,104 @@ class BaselineManager:
         dates = self.get_baseline_dates()
         return dates[-1] if dates else None
     
-    def get_devices_in_baseline(self, baseline_date):
-        """获取指定基线中的所有设备日志"""
-        baseline_path = os.path.join(self.baseline_root, baseline_date)
-        if not os.path.exists(baseline_path):
-            return []
+    def invalidate_cache(self, baseline_date=None):
+        """清除基线目录扫描缓存；不指定日期时清除全部"""
+        if baseline_date is None:
+            self._devices_cache.clear()
+        else:
+            self._devices_cache.pop(baseline_date, None)
+    
+    def _scan_baseline(self, baseline_date):
+        """扫描指定基线目录，返回 (设备日志列表, {设备名: 设备日志})，结果按日期缓存"""
+        cached = self._devices_cache.get(baseline_date)
+        if cached is not None:
+            return cached
         
+        baseline_path = os.path.join(self.baseline_root, baseline_date)
         device_logs = []
-        for log_file in os.listdir(baseline_path):
-            if log_file.endswith(".log"):
-                # 优化设备名称提取逻辑，只匹配设备名称部分
-                match = re.match(r'\[(.*?)\]', log_file)
-                if match:
-                    device_logs.append({
-                        "file_name": log_file,
-                        "device_name": match.group(1),
-                        "file_path": os.path.join(baseline_path, log_file)
-                    })
-        return device_logs
+        by_name = {}
+        try:
+            with os.scandir(baseline_path) as entries:
+                for entry in entries:
+                    log_file = entry.name
+                    # 设备日志名形如 "[设备名]_[日期].log"，不以 "[" 开头的直接跳过正则
+                    if log_file.endswith(".log") and log_file.startswith("["):
+                        # 优化设备名称提取逻辑，只匹配设备名称部分
+                        match = _DEVICE_NAME_RE.match(log_file)
+                        if match:
+                            device = {
+                                "file_name": log_file,
+                                "device_name": match.group(1),
+                                "file_path": entry.path
+                            }
+                            device_logs.append(device)
+                            by_name.setdefault(device["device_name"], device)  # 同名设备以首个为准
+        except FileNotFoundError:
+            pass  # 基线目录不存在，视为无设备
+        
+        cached = self._devices_cache[baseline_date] = (device_logs, by_name)
+        return cached
+    
+    def get_devices_in_baseline(self, baseline_date):
+        """获取指定基线中的所有设备日志（返回缓存列表，调用方不应修改）"""
+        return self._scan_baseline(baseline_date)[0]
+    
+    def get_device_in_baseline(self, baseline_date, device_name):
+        """按设备名查找指定基线中的设备日志，不存在时返回None"""
+        return self._scan_baseline(baseline_date)[1].get(device_name)
     
     def extract_device_status(self, log_path):
-        """从日志文件中提取设备状态"""
-        with open(log_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        """从日志文件中提取设备状态（按文件修改时间和大小缓存，返回结果调用方不应修改）"""
+        st = os.stat(log_path)
+        stat_key = (st.st_mtime_ns, st.st_size)
+        cached = self._status_cache.get(log_path)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1]
         
-        device_type = detect_device_type(content)
-        if not device_type:
-            return None
+        # 映射文件代替 read()，摘要和解码直接在映射上进行，省去一份与文件等大的 bytes 副本
+        with open(log_path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # 空文件无法映射
+                data = f.read()
+        try:
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            if digest in self._content_cache:
+                status = self._content_cache[digest]
+            else:
+                content = decode_log_bytes(data)
+                
+                device_type = detect_device_type(content)
+                if not device_type:
+                    status = None
+                else:
+                    status = {"device_type": device_type}
+                    status.update(parse_all(content, device_type))
+                self._content_cache[digest] = status
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()  # 及时释放映射，Windows 下映射未关闭时文件无法被替换或删除
         
-        return {
-            "device_type": device_type,
-            "port_status": parse_dis_int_brief(content, device_type),
-            "stp_status": parse_dis_stp_brief(content),
-            "lldp_status": parse_dis_lldp_neighbor(content)
-        }
+        self._status_cache[log_path] = (stat_key, status)
+        return status
+    
+    def prefetch_device_status(self, log_paths):
+        """
+        用线程池并发读取并解析一批日志，结果写入状态缓存
+        仅用于预热：单个文件失败时忽略，后续正常调用 extract_device_status 时再报错
+        """
+        pending = [p for p in log_paths if p not in self._status_cache]
+        if len(pending) < 2:
+            return
+        
+        def _load(path):
+            try:
+                self.extract_device_status(path)
+            except Exception:
+                pass
+        
+        with ThreadPoolExecutor(max_workers=min(_STATUS_PREFETCH_WORKERS, len(pending))) as executor:
+            list(executor.map(_load, pending))
     
     def compare_baseline_consistency(self):
         """比较所有基线的一致性"""
@@ -784,13 +958,27 @@ class BaselineManager:
             "missing_devices": []
         }
         
+        # 循环内频繁追加问题记录，预先绑定 append 方法
+        issues_append = consistency_results["consistency_issues"].append
+        missing_append = consistency_results["missing_devices"].append
+        
+        # 各旧基线的 {设备名: 设备日志}，循环外取一次，循环内只做字典查找
+        old_index = {old_date: self._scan_baseline(old_date)[1] for old_date in old_dates}
+        
+        # 并发预读本次要对比的全部日志（最新基线设备及其在旧基线中的对应日志）
+        names = [device["device_name"] for device in latest_devices]
+        self.prefetch_device_status(
+            [device["file_path"] for device in latest_devices] +
+            [old_index[old_date][name]["file_path"] for old_date in old_dates for name in names if name in old_index[old_date]]
+        )
+        
         # 遍历最新基线中的每个设备
         for device in latest_devices:
             device_name = device["device_name"]
             latest_status = self.extract_device_status(device["file_path"])
             
             if not latest_status:
-                consistency_results["consistency_issues"].append({
+                issues_append({
                     "device_name": device_name,
                     "issue_type": "parse_error",
                     "description": f"最新基线日志解析失败: {device['file_name']}"
@@ -799,11 +987,10 @@ class BaselineManager:
             
             # 检查该设备在所有旧基线中是否存在
             for old_date in old_dates:
-                old_devices = self.get_devices_in_baseline(old_date)
-                old_device = next((d for d in old_devices if d["device_name"] == device_name), None)
+                old_device = old_index[old_date].get(device_name)
                 
                 if not old_device:
-                    consistency_results["missing_devices"].append({
+                    missing_append({
                         "device_name": device_name,
                         "missing_in": old_date
                     })
@@ -811,7 +998,7 @@ class BaselineManager:
                 
                 old_status = self.extract_device_status(old_device["file_path"])
                 if not old_status:
-                    consistency_results["consistency_issues"].append({
+                    issues_append({
                         "device_name": device_name,
                         "issue_type": "parse_error",
                         "description": f"旧基线日志解析失败: {old_device['file_name']}"
@@ -819,67 +1006,64 @@ class BaselineManager:
                     continue
                 
                 # 对比端口状态一致性
-                for port in latest_status["port_status"]:
-                    if port in old_status["port_status"]:
-                        latest_port = latest_status["port_status"][port]
-                        old_port = old_status["port_status"][port]
+                for port, latest_port in latest_status["port_status"].items():
+                    old_port = old_status["port_status"].get(port)
+                    if old_port is not None:
                         
                         # 检查管理状态和链路状态一致性
                         if latest_port["admin_status"] != old_port["admin_status"]:
-                            consistency_results["consistency_issues"].append({
+                            issues_append({
                                 "device_name": device_name,
                                 "issue_type": "port_status_inconsistent",
                                 "description": f"端口{port}管理状态不一致: {old_date}={old_port['admin_status']}, {latest_date}={latest_port['admin_status']}"
                             })
                         
                         if latest_port["line_status"] != old_port["line_status"]:
-                            consistency_results["consistency_issues"].append({
+                            issues_append({
                                 "device_name": device_name,
                                 "issue_type": "port_status_inconsistent",
                                 "description": f"端口{port}链路状态不一致: {old_date}={old_port['line_status']}, {latest_date}={latest_port['line_status']}"
                             })
                     else:
-                        consistency_results["consistency_issues"].append({
+                        issues_append({
                             "device_name": device_name,
                             "issue_type": "port_missing",
                             "description": f"端口{port}在{old_date}基线中不存在"
                         })
                 
                 # 对比STP状态一致性
-                for port in latest_status["stp_status"]:
-                    if port in old_status["stp_status"]:
-                        latest_stp = latest_status["stp_status"][port]
-                        old_stp = old_status["stp_status"][port]
+                for port, latest_stp in latest_status["stp_status"].items():
+                    old_stp = old_status["stp_status"].get(port)
+                    if old_stp is not None:
                         
                         # STP状态必须为FORWARDING
                         if latest_stp["stp_state"] != "FORWARDING":
-                            consistency_results["consistency_issues"].append({
+                            issues_append({
                                 "device_name": device_name,
                                 "issue_type": "stp_state_invalid",
                                 "description": f"端口{port}STP状态异常: {latest_stp['stp_state']}"
                             })
                         if old_stp["stp_state"] != "FORWARDING":
-                            consistency_results["consistency_issues"].append({
+                            issues_append({
                                 "device_name": device_name,
                                 "issue_type": "stp_state_invalid",
                                 "description": f"端口{port}在{old_date}基线中STP状态异常: {old_stp['stp_state']}"
                             })
                     else:
-                        consistency_results["consistency_issues"].append({
+                        issues_append({
                             "device_name": device_name,
                             "issue_type": "stp_missing",
                             "description": f"端口{port}STP状态在{old_date}基线中不存在"
                         })
                 
                 # 对比LLDP状态一致性
-                for port in latest_status["lldp_status"]:
-                    if port in old_status["lldp_status"]:
-                        latest_lldp = latest_status["lldp_status"][port]
-                        old_lldp = old_status["lldp_status"][port]
+                for port, latest_lldp in latest_status["lldp_status"].items():
+                    old_lldp = old_status["lldp_status"].get(port)
+                    if old_lldp is not None:
                         
                         # 检查邻居存在性一致性
                         if latest_lldp["has_neighbor"] != old_lldp["has_neighbor"]:
-                            consistency_results["consistency_issues"].append({
+                            issues_append({
                                 "device_name": device_name,
                                 "issue_type": "lldp_neighbor_inconsistent",
                                 "description": f"端口{port}邻居存在性不一致: {old_date}={old_lldp['has_neighbor']}, {latest_date}={latest_lldp['has_neighbor']}"
@@ -888,7 +1072,7 @@ class BaselineManager:
                         # 检查邻居设备一致性
                         if (latest_lldp["has_neighbor"] and old_lldp["has_neighbor"] and \
                             latest_lldp["neighbor_dev"] != old_lldp["neighbor_dev"]):
-                            consistency_results["consistency_issues"].append({
+                            issues_append({
                                 "device_name": device_name,
                                 "issue_type": "lldp_neighbor_dev_inconsistent",
                                 "description": f"端口{port}邻居设备不一致: {old_date}={old_lldp['neighbor_dev']}, {latest_date}={latest_lldp['neighbor_dev']}"
@@ -897,13 +1081,13 @@ class BaselineManager:
                         # 检查邻居端口一致性
                         if (latest_lldp["has_neighbor"] and old_lldp["has_neighbor"] and \
                             latest_lldp["neighbor_port"] != old_lldp["neighbor_port"]):
-                            consistency_results["consistency_issues"].append({
+                            issues_append({
                                 "device_name": device_name,
                                 "issue_type": "lldp_neighbor_port_inconsistent",
                                 "description": f"端口{port}邻居端口不一致: {old_date}={old_lldp['neighbor_port']}, {latest_date}={latest_lldp['neighbor_port']}"
                             })
                     else:
-                        consistency_results["consistency_issues"].append({
+                        issues_append({
                             "device_name": device_name,
                             "issue_type": "lldp_missing",
                             "description": f"端口{port}LLDP状态在{old_date}基线中不存在"
@@ -911,6 +1095,52 @@ class BaselineManager:
         
         return consistency_results
     
+    def _baseline_fingerprint(self):
+        """基线指纹：各基线目录下设备日志的 [文件名, 修改时间, 大小]，任一日志增删改都会使指纹变化"""
+        fingerprint = []
+        for date in self.get_baseline_dates():
+            files = []
+            for device in self.get_devices_in_baseline(date):
+                try:
+                    st = os.stat(device["file_path"])
+                    files.append([device["file_name"], st.st_mtime_ns, st.st_size])
+                except OSError:
+                    files.append([device["file_name"], None, None])  # 交由一致性检查报告该日志
+            fingerprint.append([date, files])
+        return fingerprint
+    
+    def get_consistency_results(self):
+        """获取基线一致性检查结果，基线日志和检查代码都未变化时直接复用上次保存的结果"""
+        code = _code_fingerprint()
+        if code is None:
+            return self.compare_baseline_consistency()  # 无法确认代码版本，不使用缓存
+        
+        key = {
+            "version": _CONSISTENCY_CACHE_VERSION,
+            "code": code,
+            "baseline_root": os.path.abspath(self.baseline_root),
+            "fingerprint": self._baseline_fingerprint()
+        }
+        try:
+            with open(self.consistency_cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached["key"] == key:
+                return cached["results"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # 缓存不存在或已损坏，重新检查
+        
+        results = self.compare_baseline_consistency()
+        
+        # 先写临时文件再整体替换；缓存写入失败不影响本次检查结果
+        tmp_file = self.consistency_cache_file + ".tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "results": results}, f, ensure_ascii=False)
+            os.replace(tmp_file, self.consistency_cache_file)
+        except OSError:
+            pass
+        return results
+    
     def generate_consistency_report(self, consistency_results, verbose=False):
         """生成可读性强的一致性报告"""
         report = []
@@ -942,13 +1172,15 @@ class BaselineManager:
                 latest_devices = self.get_devices_in_baseline(consistency_results['latest_baseline'])
                 # 获取所有基线日期
                 all_dates = consistency_results['baseline_dates']
+                # 有缺失或一致性问题的设备名，循环内直接查集合，避免每个设备都遍历全部问题
+                problem_devices = {missing['device_name'] for missing in consistency_results['missing_devices']}
+                problem_devices.update(issue['device_name'] for issue in consistency_results['consistency_issues'])
                 
                 # 如果有device_mapping，使用device_mapping显示设备对应情况
                 if 'device_mapping' in consistency_results and consistency_results['device_mapping']:
                     for device_name, info in consistency_results['device_mapping'].items():
                         # 检查该设备是否有问题
-                        device_has_issues = any(missing['device_name'] == device_name for missing in consistency_results['missing_devices']) or \
-                                           any(issue['device_name'] == device_name for issue in consistency_results['consistency_issues'])
+                        device_has_issues = device_name in problem_devices
                         # 只有在有问题或verbose模式下才显示该设备
                         if device_has_issues or verbose:
                             report.append(f"  {device_name}:")
@@ -963,15 +1195,13 @@ class BaselineManager:
                     device_names = list(set([d["device_name"] for d in latest_devices]))
                     for device_name in sorted(device_names):
                         # 检查该设备是否有问题
-                        device_has_issues = any(missing['device_name'] == device_name for missing in consistency_results['missing_devices']) or \
-                                           any(issue['device_name'] == device_name for issue in consistency_results['consistency_issues'])
+                        device_has_issues = device_name in problem_devices
                         # 只有在有问题或verbose模式下才显示该设备
                         if device_has_issues or verbose:
                             report.append(f"  {device_name}:")
                             for date in all_dates:
                                 # 检查该设备在当前日期基线中是否存在
-                                date_devices = self.get_devices_in_baseline(date)
-                                device_in_date = next((d for d in date_devices if d["device_name"] == device_name), None)
+                                device_in_date = self.get_device_in_baseline(date, device_name)
                                 if device_in_date:
                                     report.append(f"    - {date}: {device_in_date['file_name']}")
                                 else:
@@ -1006,10 +1236,14 @@ class BaselineManager:
         
         return "\n".join(report)
     
-    def compare_with_baseline(self, log_path):
-        """将日志文件与最新基线进行对比"""
+    def compare_with_baseline(self, log_path, consistency_results=None):
+        """
+        将日志文件与最新基线进行对比
+        consistency_results 为已完成的基线一致性检查结果(可选)，批量对比时传入可避免每个文件重复检查
+        """
         # 1. 检查基线一致性
-        consistency_results = self.compare_baseline_consistency()
+        if consistency_results is None:
+            consistency_results = self.compare_baseline_consistency()
         if 'status' in consistency_results and consistency_results['status'] == 'info':
             return {
                 'status': 'error',
@@ -1018,27 +1252,16 @@ class BaselineManager:
         
         # 2. 解析日志文件
         device_name = get_device_name(log_path)
-        with open(log_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        device_type = detect_device_type(content)
-        if not device_type:
+        log_status = self.extract_device_status(log_path)  # 与基线日志共用解析缓存
+        if not log_status:
             return {
                 'status': 'error',
                 'message': f'无法检测设备类型: {log_path}'
             }
         
-        log_status = {
-            'device_type': device_type,
-            'port_status': parse_dis_int_brief(content, device_type),
-            'stp_status': parse_dis_stp_brief(content),
-            'lldp_status': parse_dis_lldp_neighbor(content)
-        }
-        
         # 3. 获取最新基线中的对应设备状态
         latest_baseline = consistency_results['latest_baseline']
-        latest_devices = self.get_devices_in_baseline(latest_baseline)
-        baseline_device = next((d for d in latest_devices if d['device_name'] == device_name), None)
+        baseline_device = self.get_device_in_baseline(latest_baseline, device_name)
         
         if not baseline_device:
             return {
@@ -1055,7 +1278,10 @@ class BaselineManager:
             'status': 'success',
             'device_name': device_name,
             'latest_baseline': latest_baseline,
-            'comparison': comparison_results
+            'comparison': comparison_results,
+            'diff_count': (len(comparison_results['port_differences']) +
+                           len(comparison_results['stp_differences']) +
+                           len(comparison_results['lldp_differences']))
         }
     
     def compare_device_status(self, log_status, baseline_status, device_name):
@@ -1071,17 +1297,16 @@ class BaselineManager:
         baseline_ports = baseline_status['port_status']
         
         # 检查新增端口
-        for port in log_ports:
-            if port not in baseline_ports:
+        for port, log_port_status in log_ports.items():
+            baseline_port_status = baseline_ports.get(port)
+            if baseline_port_status is None:
                 results['port_differences'].append({
                     'type': 'new_port',
                     'port': port,
-                    'status': log_ports[port]
+                    'status': log_port_status
                 })
             else:
                 # 检查端口状态变化
-                log_port_status = log_ports[port]
-                baseline_port_status = baseline_ports[port]
                 
                 # 检查管理状态和链路状态变化
                 if log_port_status.get('admin_status') != baseline_port_status.get('admin_status'):
@@ -1100,109 +1325,120 @@ class BaselineManager:
                         'new_status': log_port_status.get('line_status')
                     })
         
-        # 检查缺失端口
-        for port in baseline_ports:
-            if port not in log_ports:
-                results['port_differences'].append({
-                    'type': 'missing_port',
-                    'port': port,
-                    'status': baseline_ports[port]
-                })
+        # 检查缺失端口（基线端口均在日志中时，keys 视图子集判断即可跳过遍历）
+        if not baseline_ports.keys() <= log_ports.keys():
+            for port in baseline_ports:
+                if port not in log_ports:
+                    results['port_differences'].append({
+                        'type': 'missing_port',
+                        'port': port,
+                        'status': baseline_ports[port]
+                    })
         
         # 对比STP状态
         log_stp = log_status['stp_status']
         baseline_stp = baseline_status['stp_status']
         
         # 检查新增STP端口
-        for port in log_stp:
-            if port not in baseline_stp:
+        for port, log_stp_status in log_stp.items():
+            baseline_stp_status = baseline_stp.get(port)
+            if baseline_stp_status is None:
                 results['stp_differences'].append({
                     'type': 'new_stp_port',
                     'port': port,
-                    'status': log_stp[port]
+                    'status': log_stp_status
                 })
             else:
-                # 检查STP状态变化
-                log_stp_status = log_stp[port]
-                baseline_stp_status = baseline_stp[port]
+                # 检查STP状态变化（各字段只取一次）
+                log_state = log_stp_status.get('stp_state')
+                base_state = baseline_stp_status.get('stp_state')
+                log_role = log_stp_status.get('role')
+                base_role = baseline_stp_status.get('role')
                 
-                if log_stp_status.get('stp_state') != baseline_stp_status.get('stp_state'):
+                if log_state != base_state:
                     results['stp_differences'].append({
                         'type': 'stp_state_change',
                         'port': port,
-                        'old_status': baseline_stp_status.get('stp_state'),
-                        'new_status': log_stp_status.get('stp_state')
+                        'old_status': base_state,
+                        'new_status': log_state
                     })
                 
-                if log_stp_status.get('role') != baseline_stp_status.get('role'):
+                if log_role != base_role:
                     results['stp_differences'].append({
                         'type': 'stp_role_change',
                         'port': port,
-                        'old_status': baseline_stp_status.get('role'),
-                        'new_status': log_stp_status.get('role')
+                        'old_status': base_role,
+                        'new_status': log_role
                     })
         
-        # 检查缺失STP端口
-        for port in baseline_stp:
-            if port not in log_stp:
-                results['stp_differences'].append({
-                    'type': 'missing_stp_port',
-                    'port': port,
-                    'status': baseline_stp[port]
-                })
+        # 检查缺失STP端口（同上）
+        if not baseline_stp.keys() <= log_stp.keys():
+            for port in baseline_stp:
+                if port not in log_stp:
+                    results['stp_differences'].append({
+                        'type': 'missing_stp_port',
+                        'port': port,
+                        'status': baseline_stp[port]
+                    })
         
         # 对比LLDP状态
         log_lldp = log_status['lldp_status']
         baseline_lldp = baseline_status['lldp_status']
         
         # 检查新增LLDP端口
-        for port in log_lldp:
-            if port not in baseline_lldp:
+        for port, log_lldp_status in log_lldp.items():
+            baseline_lldp_status = baseline_lldp.get(port)
+            if baseline_lldp_status is None:
                 results['lldp_differences'].append({
                     'type': 'new_lldp_port',
                     'port': port,
-                    'status': log_lldp[port]
+                    'status': log_lldp_status
                 })
             else:
-                # 检查LLDP状态变化
-                log_lldp_status = log_lldp[port]
-                baseline_lldp_status = baseline_lldp[port]
+                # 检查LLDP状态变化（各字段只取一次）
+                log_has = log_lldp_status.get('has_neighbor')
+                base_has = baseline_lldp_status.get('has_neighbor')
                 
-                if log_lldp_status.get('has_neighbor') != baseline_lldp_status.get('has_neighbor'):
+                if log_has != base_has:
                     results['lldp_differences'].append({
                         'type': 'lldp_neighbor_presence_change',
                         'port': port,
-                        'old_status': baseline_lldp_status.get('has_neighbor'),
-                        'new_status': log_lldp_status.get('has_neighbor')
-                    })
-                
-                if (log_lldp_status.get('has_neighbor') and baseline_lldp_status.get('has_neighbor') and \
-                    log_lldp_status.get('neighbor_dev') != baseline_lldp_status.get('neighbor_dev')):
-                    results['lldp_differences'].append({
-                        'type': 'lldp_neighbor_dev_change',
-                        'port': port,
-                        'old_status': baseline_lldp_status.get('neighbor_dev'),
-                        'new_status': log_lldp_status.get('neighbor_dev')
+                        'old_status': base_has,
+                        'new_status': log_has
                     })
                 
-                if (log_lldp_status.get('has_neighbor') and baseline_lldp_status.get('has_neighbor') and \
-                    log_lldp_status.get('neighbor_port') != baseline_lldp_status.get('neighbor_port')):
+                # 两边都有邻居时才比较邻居设备和端口
+                if log_has and base_has:
+                    log_dev = log_lldp_status.get('neighbor_dev')
+                    base_dev = baseline_lldp_status.get('neighbor_dev')
+                    if log_dev != base_dev:
+                        results['lldp_differences'].append({
+                            'type': 'lldp_neighbor_dev_change',
+                            'port': port,
+                            'old_status': base_dev,
+                            'new_status': log_dev
+                        })
+                    
+                    log_nport = log_lldp_status.get('neighbor_port')
+                    base_nport = baseline_lldp_status.get('neighbor_port')
+                    if log_nport != base_nport:
+                        results['lldp_differences'].append({
+                            'type': 'lldp_neighbor_port_change',
+                            'port': port,
+                            'old_status': base_nport,
+                            'new_status': log_nport
+                        })
+        
+        # 检查缺失LLDP端口（同上）
+        if not baseline_lldp.keys() <= log_lldp.keys():
+            for port in baseline_lldp:
+                if port not in log_lldp:
                     results['lldp_differences'].append({
-                        'type': 'lldp_neighbor_port_change',
+                        'type': 'missing_lldp_port',
                         'port': port,
-                        'old_status': baseline_lldp_status.get('neighbor_port'),
-                        'new_status': log_lldp_status.get('neighbor_port')
+                        'status': baseline_lldp[port]
                     })
         
-        # 检查缺失LLDP端口
-        for port in baseline_lldp:
-            if port not in log_lldp:
-                results['lldp_differences'].append({
-                    'type': 'missing_lldp_port',
-                    'port': port,
-                    'status': baseline_lldp[port]
-                })
-        
         return results
     
     def build_device_mapping(self):
@@ -1210,11 +1446,12 @@ class BaselineManager:
         baseline_dates = self.get_baseline_dates()
         device_mapping = {}
         
+        # 基线日期已按时间升序排列，后出现的日期即为更新的基线
         for date in baseline_dates:
-            devices = self.get_devices_in_baseline(date)
-            for device in devices:
+            for device in self.get_devices_in_baseline(date):
                 device_name = device["device_name"]
-                if device_name not in device_mapping:
+                info = device_mapping.get(device_name)
+                if info is None:
                     device_mapping[device_name] = {
                         "latest_baseline": date,
                         "history_baselines": [date],
@@ -1222,18 +1459,18 @@ class BaselineManager:
                     }
                 else:
                     # 更新最新基线
-                    if date > device_mapping[device_name]["latest_baseline"]:
-                        device_mapping[device_name]["latest_baseline"] = date
-                    # 添加到历史基线
-                    if date not in device_mapping[device_name]["history_baselines"]:
-                        device_mapping[device_name]["history_baselines"].append(date)
+                    info["latest_baseline"] = date
+                    # 添加到历史基线（同一基线内的同名设备只记一次）
+                    if info["history_baselines"][-1] != date:
+                        info["history_baselines"].append(date)
                     # 添加基线文件映射
-                    device_mapping[device_name]["baseline_files"][date] = device["file_name"]
+                    info["baseline_files"][date] = device["file_name"]
         
         return device_mapping
     
     def update_index(self):
         """更新基线索引"""
+        self.invalidate_cache()  # 按磁盘当前内容重建索引
         baseline_dates = self.get_baseline_dates()
         if not baseline_dates:
             self.index["latest_baseline"] = None
@@ -1261,8 +1498,64 @@ class BaselineManager:
         
         self.save_index()
 
+# 对比差异类型 -> (标题, [(字段名称, 字段键), ...])，渲染报告时按类型直接查表
+_STATUS_CHANGE_FIELDS = [("旧状态", "old_status"), ("新状态", "new_status")]
+_PORT_DIFF_RENDERERS = {
+    "new_port": ("  + 新增端口", [("状态", "status")]),
+    "missing_port": ("  - 缺失端口", [("基线状态", "status")]),
+    "admin_status_change": ("  * 管理状态变化", _STATUS_CHANGE_FIELDS),
+    "line_status_change": ("  * 链路状态变化", _STATUS_CHANGE_FIELDS),
+}
+_STP_DIFF_RENDERERS = {
+    "new_stp_port": ("  + 新增STP端口", [("状态", "status")]),
+    "missing_stp_port": ("  - 缺失STP端口", [("基线状态", "status")]),
+    "stp_state_change": ("  * STP状态变化", _STATUS_CHANGE_FIELDS),
+    "stp_role_change": ("  * STP角色变化", [("旧角色", "old_status"), ("新角色", "new_status")]),
+}
+_LLDP_DIFF_RENDERERS = {
+    "new_lldp_port": ("  + 新增LLDP端口", [("状态", "status")]),
+    "missing_lldp_port": ("  - 缺失LLDP端口", [("基线状态", "status")]),
+    "lldp_neighbor_presence_change": ("  * LLDP邻居存在性变化", _STATUS_CHANGE_FIELDS),
+    "lldp_neighbor_dev_change": ("  * LLDP邻居设备变化", [("旧邻居", "old_status"), ("新邻居", "new_status")]),
+    "lldp_neighbor_port_change": ("  * LLDP邻居端口变化", [("旧端口", "old_status"), ("新端口", "new_status")]),
+}
+
+def _render_diffs(report, diffs, renderers):
+    """按差异类型查表，将差异条目逐条追加到报告中（未知类型跳过）"""
+    for diff in diffs:
+        renderer = renderers.get(diff['type'])
+        if renderer is None:
+            continue
+        label, fields = renderer
+        report.append(f"{label}: {diff['port']}")
+        report.extend(f"     {name}: {diff[key]}" for name, key in fields)
+
+# 无任何差异时的对比报告内容固定，只需填入设备名和基线日期
+_NO_DIFF_REPORT_TEMPLATE = "\n".join([
+    "="*60,
+    "设备日志对比报告 - {device_name}",
+    "="*60,
+    "最新基线: {latest_baseline}",
+    "",
+    "1. 端口状态: 无差异 ✓",
+    "",
+    "2. STP状态: 无差异 ✓",
+    "",
+    "3. LLDP状态: 无差异 ✓",
+    "",
+    "4. 对比状态: 完全一致 ✓",
+    "="*60,
+])
+
 def generate_comparison_report(comparison_results):
     """生成可读性强的对比报告"""
+    # 完全一致的设备直接套用固定模板，无需逐段拼接
+    comparison = comparison_results['comparison']
+    if not (comparison['port_differences'] or comparison['stp_differences'] or comparison['lldp_differences']):
+        return _NO_DIFF_REPORT_TEMPLATE.format(
+            device_name=comparison_results['device_name'],
+            latest_baseline=comparison_results['latest_baseline'])
+    
     report = []
     report.append("="*60)
     report.append(f"设备日志对比报告 - {comparison_results['device_name']}")
@@ -1275,21 +1568,7 @@ def generate_comparison_report(comparison_results):
     if port_diff:
         report.append("1. 端口状态差异:")
         report.append("-"*40)
-        for diff in port_diff:
-            if diff['type'] == 'new_port':
-                report.append(f"  + 新增端口: {diff['port']}")
-                report.append(f"     状态: {diff['status']}")
-            elif diff['type'] == 'missing_port':
-                report.append(f"  - 缺失端口: {diff['port']}")
-                report.append(f"     基线状态: {diff['status']}")
-            elif diff['type'] == 'admin_status_change':
-                report.append(f"  * 管理状态变化: {diff['port']}")
-                report.append(f"     旧状态: {diff['old_status']}")
-                report.append(f"     新状态: {diff['new_status']}")
-            elif diff['type'] == 'line_status_change':
-                report.append(f"  * 链路状态变化: {diff['port']}")
-                report.append(f"     旧状态: {diff['old_status']}")
-                report.append(f"     新状态: {diff['new_status']}")
+        _render_diffs(report, port_diff, _PORT_DIFF_RENDERERS)
         report.append("")
     else:
         report.append("1. 端口状态: 无差异 ✓")
@@ -1300,21 +1579,7 @@ def generate_comparison_report(comparison_results):
     if stp_diff:
         report.append("2. STP状态差异:")
         report.append("-"*40)
-        for diff in stp_diff:
-            if diff['type'] == 'new_stp_port':
-                report.append(f"  + 新增STP端口: {diff['port']}")
-                report.append(f"     状态: {diff['status']}")
-            elif diff['type'] == 'missing_stp_port':
-                report.append(f"  - 缺失STP端口: {diff['port']}")
-                report.append(f"     基线状态: {diff['status']}")
-            elif diff['type'] == 'stp_state_change':
-                report.append(f"  * STP状态变化: {diff['port']}")
-                report.append(f"     旧状态: {diff['old_status']}")
-                report.append(f"     新状态: {diff['new_status']}")
-            elif diff['type'] == 'stp_role_change':
-                report.append(f"  * STP角色变化: {diff['port']}")
-                report.append(f"     旧角色: {diff['old_status']}")
-                report.append(f"     新角色: {diff['new_status']}")
+        _render_diffs(report, stp_diff, _STP_DIFF_RENDERERS)
         report.append("")
     else:
         report.append("2. STP状态: 无差异 ✓")
@@ -1325,36 +1590,15 @@ def generate_comparison_report(comparison_results):
     if lldp_diff:
         report.append("3. LLDP状态差异:")
         report.append("-"*40)
-        for diff in lldp_diff:
-            if diff['type'] == 'new_lldp_port':
-                report.append(f"  + 新增LLDP端口: {diff['port']}")
-                report.append(f"     状态: {diff['status']}")
-            elif diff['type'] == 'missing_lldp_port':
-                report.append(f"  - 缺失LLDP端口: {diff['port']}")
-                report.append(f"     基线状态: {diff['status']}")
-            elif diff['type'] == 'lldp_neighbor_presence_change':
-                report.append(f"  * LLDP邻居存在性变化: {diff['port']}")
-                report.append(f"     旧状态: {diff['old_status']}")
-                report.append(f"     新状态: {diff['new_status']}")
-            elif diff['type'] == 'lldp_neighbor_dev_change':
-                report.append(f"  * LLDP邻居设备变化: {diff['port']}")
-                report.append(f"     旧邻居: {diff['old_status']}")
-                report.append(f"     新邻居: {diff['new_status']}")
-            elif diff['type'] == 'lldp_neighbor_port_change':
-                report.append(f"  * LLDP邻居端口变化: {diff['port']}")
-                report.append(f"     旧端口: {diff['old_status']}")
-                report.append(f"     新端口: {diff['new_status']}")
+        _render_diffs(report, lldp_diff, _LLDP_DIFF_RENDERERS)
         report.append("")
     else:
         report.append("3. LLDP状态: 无差异 ✓")
         report.append("")
     
-    # 统计信息
+    # 统计信息（无差异的情况已在开头按模板返回）
     total_diff = len(port_diff) + len(stp_diff) + len(lldp_diff)
-    if total_diff == 0:
-        report.append("4. 对比状态: 完全一致 ✓")
-    else:
-        report.append(f"4. 对比状态: 发现 {total_diff} 个差异 ✗")
+    report.append(f"4. 对比状态: 发现 {total_diff} 个差异 ✗")
     
     report.append("="*60)
     
@@ -1364,10 +1608,11 @@ def generate_comparison_report(comparison_results):
 # 主程序入口
 # ==============================================
 
+def _print_nothing(*args, **kwargs):
+    """静默输出时代替 print 的空函数"""
+
 def main():
     """主程序"""
-    import argparse
-    
     base_dir = get_base_dir()
     default_baseline = os.path.join(base_dir, 'baseline')
     default_logs = os.path.join(base_dir, 'logs')
@@ -1390,33 +1635,37 @@ def main():
                         help='测试模式，使用示例数据进行测试')
     
     args = parser.parse_args()
+    # 输出控制参数在后续流程中反复判断，取出为局部变量
+    quiet = args.quiet
+    verbose = args.verbose
+    # 按输出级别一次性选定打印函数，各处直接调用，无需逐处判断
+    log = _print_nothing if quiet else print
+    vlog = print if verbose else _print_nothing
     
     # 初始化基线管理器
-    if not os.path.exists(args.baseline_dir):
-        try:
-            os.makedirs(args.baseline_dir)
-            if args.verbose:
-                print(f"已创建基线目录: {args.baseline_dir}")
-        except Exception as e:
-            print(f"创建基线目录失败: {e}")
+    # 直接尝试创建，已存在时忽略，省去先判断是否存在的一次 stat
+    try:
+        os.makedirs(args.baseline_dir)
+        vlog(f"已创建基线目录: {args.baseline_dir}")
+    except FileExistsError:
+        pass
+    except Exception as e:
+        print(f"创建基线目录失败: {e}")
             
     baseline_manager = BaselineManager(args.baseline_dir)
     
     if args.mode == 'index':
         # 仅更新索引模式
-        if args.verbose:
-            print(f"更新基线索引...")
+        vlog(f"更新基线索引...")
         baseline_manager.update_index()
-        if not args.quiet:
-            print("基线索引更新完成")
+        log("基线索引更新完成")
         sys.exit(0)
     
     # 其他模式都先进行基线一致性检查
-    if not args.quiet:
-        print("开始执行基线一致性检查...")
+    log("开始执行基线一致性检查...")
     
-    # 检查基线一致性
-    consistency_results = baseline_manager.compare_baseline_consistency()
+    # 检查基线一致性（基线日志未变化时复用上次的检查结果）
+    consistency_results = baseline_manager.get_consistency_results()
     
     # 检查基线一致性状态
     if 'status' in consistency_results and consistency_results['status'] == 'info':
@@ -1427,18 +1676,20 @@ def main():
     total_issues = len(consistency_results['consistency_issues']) + len(consistency_results['missing_devices'])
     
     # 显示基线一致性状态
-    if not args.quiet:
+    if not quiet:
         if total_issues == 0:
             print("基线一致性状态: 全部一致 ✓")
         else:
             print(f"基线一致性状态: 发现 {total_issues} 个问题 ✗")
         print()
     
+    # 一致性报告只生成一次，一致性检查模式下复用
+    report = None
+    
     # 如果基线有问题，询问用户是否打印详细信息
     if total_issues > 0:
         # 生成基线一致性报告
-        report = baseline_manager.generate_consistency_report(consistency_results, verbose=args.verbose)
-        report_lines = report.split('\n')
+        report = baseline_manager.generate_consistency_report(consistency_results, verbose=verbose)
         
         # 询问用户是否打印基线详细信息
         try:
@@ -1465,69 +1716,81 @@ def main():
                 pass
         
         # 基线没问题或用户选择继续，执行索引更新
-        if args.verbose:
-            print(f"更新基线索引...")
+        vlog(f"更新基线索引...")
         baseline_manager.update_index()
         
         # 2. 获取日志文件夹下的最新日志子文件夹
-        import glob
-        log_dirs = glob.glob(os.path.join(args.log_dir, '*'))
-        log_dirs = [d for d in log_dirs if os.path.isdir(d)]
+        # scandir 的目录项自带类型信息，无需再逐项 stat（与 glob 一样跳过隐藏项）
+        log_dirs = []
+        try:
+            with os.scandir(args.log_dir) as entries:
+                log_dirs = [entry.path for entry in entries
+                            if not entry.name.startswith('.') and entry.is_dir()]
+        except FileNotFoundError:
+            pass  # 日志文件夹不存在，按没有子文件夹处理
         if not log_dirs:
             print(f"错误：{args.log_dir} 文件夹下没有日志子文件夹")
             sys.exit(1)
         
-        latest_log_dir = sorted(log_dirs)[-1]
+        latest_log_dir = max(log_dirs)
         
         # 3. 获取日志文件
-        log_files = glob.glob(os.path.join(latest_log_dir, "*.log"))
+        with os.scandir(latest_log_dir) as entries:
+            log_files = [entry.path for entry in entries
+                         if entry.name.endswith(".log") and not entry.name.startswith('.') and entry.is_file()]
         if not log_files:
             print(f"错误：{latest_log_dir} 文件夹下没有日志文件")
             sys.exit(1)
         
         # 4. 遍历日志文件，与基线进行对比
-        if not args.quiet:
-            print(f"开始对比日志文件与基线...")
-            print(f"最新日志文件夹: {latest_log_dir}")
-            print(f"日志文件数量: {len(log_files)}")
-            print()
+        log(f"开始对比日志文件与基线...")
+        log(f"最新日志文件夹: {latest_log_dir}")
+        log(f"日志文件数量: {len(log_files)}")
+        log()
         
-        all_reports = []
-        total_differences = 0
+        # 并发预读全部待对比日志，逐个对比时直接命中解析缓存
+        baseline_manager.prefetch_device_status(log_files)
         
-        for log_file in log_files:
-            if not args.quiet:
-                print(f"=== 对比日志文件: {log_file} ===")
-            comparison_results = baseline_manager.compare_with_baseline(log_file)
-            
-            if comparison_results['status'] == 'success':
-                # 生成对比报告
-                report = generate_comparison_report(comparison_results)
-                if not args.quiet:
-                    print(report)
-                    print()
-                
-                all_reports.append(report)
-                
-                # 统计差异数量
-                comparison = comparison_results['comparison']
-                diff_count = len(comparison['port_differences']) + len(comparison['stp_differences']) + len(comparison['lldp_differences'])
-                total_differences += diff_count
-            else:
-                error_msg = f"错误：{comparison_results['message']}"
-                if not args.quiet:
-                    print(error_msg)
-                    print()
-                all_reports.append(error_msg)
+        total_differences = 0
         
-        # 5. 保存综合报告到文件
+        # 5. 综合报告逐个写入文件，不在内存中累积全部报告
         report_file = os.path.join(baseline_manager.baseline_root, f"comparison_report_{time.strftime('%Y%m%d_%H%M%S')}.txt")
-        with open(report_file, "w", encoding="utf-8") as f:
-            f.write("\n\n".join(all_reports))
+        # 循环内反复调用的方法预先绑定为局部变量
+        compare_with_baseline = baseline_manager.compare_with_baseline
+        # 先写临时文件，全部对比完成后再整体替换；中途出错时删除临时文件，不留下半截报告
+        tmp_file = report_file + ".tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                write = f.write
+                for index, log_file in enumerate(log_files):
+                    log(f"=== 对比日志文件: {log_file} ===")
+                    comparison_results = compare_with_baseline(log_file, consistency_results)
+                    
+                    if comparison_results['status'] == 'success':
+                        # 生成对比报告
+                        report = generate_comparison_report(comparison_results)
+                        log(report, end="\n\n")  # 报告与其后的空行一次输出
+                        
+                        # 统计差异数量
+                        total_differences += comparison_results['diff_count']
+                    else:
+                        report = f"错误：{comparison_results['message']}"
+                        log(report, end="\n\n")  # 报告与其后的空行一次输出
+                    
+                    # 报告之间以空行分隔
+                    if index:
+                        write("\n\n")
+                    write(report)
+        except BaseException:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            raise
+        os.replace(tmp_file, report_file)
         
-        if not args.quiet:
-            print(f"\n综合报告已保存到: {report_file}")
-            print(f"总差异数量: {total_differences}")
+        log(f"\n综合报告已保存到: {report_file}")
+        log(f"总差异数量: {total_differences}")
         
         if total_differences > 0:
             sys.exit(1)  # 非零退出码表示有差异
@@ -1537,22 +1800,22 @@ def main():
         # 一致性检查模式
         # 基线没问题，执行索引更新
         if total_issues == 0:
-            if args.verbose:
-                print(f"更新基线索引...")
+            vlog(f"更新基线索引...")
             baseline_manager.update_index()
         
-        # 生成报告
-        report = baseline_manager.generate_consistency_report(consistency_results, verbose=args.verbose)
+        # 生成报告（前面已生成过则直接复用）
+        if report is None:
+            report = baseline_manager.generate_consistency_report(consistency_results, verbose=verbose)
         
         # 打印报告
-        if not args.quiet:
+        if not quiet:
             # 默认只打印关键信息（前6行和最后一行）
-            report_lines = report.split('\n')
-            if args.verbose:
+            if verbose:
                 # 详细模式，打印完整报告
                 print(report)
             else:
-                # 非详细模式，只打印关键信息
+                # 非详细模式，只打印关键信息（只在此处按行切分报告）
+                report_lines = report.split('\n')
                 # 打印报告头（前6行）
                 for line in report_lines[:6]:
                     print(line)
@@ -1580,17 +1843,14 @@ def main():
             report_file = os.path.join(baseline_manager.baseline_root, f"consistency_report_{time.strftime('%Y%m%d_%H%M%S')}.txt")
             with open(report_file, "w", encoding="utf-8") as f:
                 f.write(report)
-            if not args.quiet:
-                print(f"\n报告已保存到: {report_file}")
+            log(f"\n报告已保存到: {report_file}")
         
         # 检查是否有一致性问题
         if total_issues > 0:
-            if not args.quiet:
-                print(f"\n发现 {total_issues} 个问题，请检查并修复！")
+            log(f"\n发现 {total_issues} 个问题，请检查并修复！")
             sys.exit(1)  # 非零退出码表示有问题
         else:
-            if not args.quiet:
-                print("\n所有基线一致，状态正常！")
+            log("\n所有基线一致，状态正常！")
             sys.exit(0)  # 零退出码表示正常
 
 if __name__ == "__main__":